@@ -0,0 +1,51 @@
+# balanza.py
+"""Etiquetas de balanza: códigos EAN-13 de uso interno (prefijo 20-29) con PLU y peso o precio.
+
+El formato se puede cambiar con un archivo balanza.json en la carpeta de datos, con una lista
+como FORMATOS_POR_DEFECTO. Posiciones: [inicio, fin) sobre los 13 dígitos del código.
+"""
+import json
+import os
+
+from database import get_data_dir
+
+FORMATOS_POR_DEFECTO = [
+    # 2X PPPPP WWWWW C  -> peso en gramos (3 decimales en kg)
+    {"prefijos": ["20", "21", "22", "23", "24"], "plu": [2, 7], "valor": [7, 12], "tipo": "peso", "decimales": 3},
+    # 2X PPPPP $$$$$ C  -> precio total de la etiqueta
+    {"prefijos": ["25", "26", "27", "28", "29"], "plu": [2, 7], "valor": [7, 12], "tipo": "precio", "decimales": 0},
+]
+
+
+def cargar_formatos(ruta=None):
+    ruta = ruta or os.path.join(get_data_dir(), "balanza.json")
+    if os.path.exists(ruta):
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f)
+    return FORMATOS_POR_DEFECTO
+
+
+def normalizar_plu(plu):
+    plu = str(plu or "").strip()
+    return (plu.lstrip("0") or "0") if plu.isdigit() else plu
+
+
+def digito_control_ean13(codigo12):
+    suma = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(codigo12))
+    return (10 - suma % 10) % 10
+
+
+def decodificar_etiqueta(codigo, formatos=FORMATOS_POR_DEFECTO):
+    """Devuelve {'plu', 'tipo', 'valor'} si el código es una etiqueta de balanza válida, o None."""
+    if len(codigo) != 13 or not codigo.isdigit():
+        return None
+    if int(codigo[12]) != digito_control_ean13(codigo[:12]):
+        return None
+    for formato in formatos:
+        if codigo[:2] not in formato["prefijos"]:
+            continue
+        inicio, fin = formato["plu"]
+        v_inicio, v_fin = formato["valor"]
+        valor = int(codigo[v_inicio:v_fin]) / (10 ** formato["decimales"])
+        return {"plu": normalizar_plu(codigo[inicio:fin]), "tipo": formato["tipo"], "valor": valor}
+    return None
@@ -0,0 +1,180 @@
+# barrilito.py
+"""Línea de comandos sin interfaz gráfica, para tareas programadas (cron / Programador de tareas).
+
+Uso:
+    python -m barrilito [--db RUTA] [--json] COMANDO ...
+
+Solo importa database.py (no PySide6), así que arranca rápido y no necesita sesión de escritorio.
+Códigos de salida: 0 correcto, 1 error, 2 uso incorrecto, 3 importación con filas rechazadas.
+"""
+import argparse
+import json
+import sys
+from datetime import date, timedelta
+
+from database import Database, DB_FILE
+
+SALIDA_OK = 0
+SALIDA_ERROR = 1
+SALIDA_USO = 2
+SALIDA_FILAS_CON_ERROR = 3
+
+
+def cmd_exportar_productos(db, args):
+    db.exportar_productos_excel(args.archivo)
+    return {'archivo': args.archivo}, SALIDA_OK
+
+
+def cmd_exportar_ventas(db, args):
+    db.exportar_ventas_excel(args.archivo)
+    return {'archivo': args.archivo}, SALIDA_OK
+
+
+def cmd_importar(db, args):
+    resumen = db.importar_productos(args.archivo)
+    resumen['errores'] = [{'fila': fila, 'error': msg} for fila, msg in resumen['errores']]
+    return resumen, SALIDA_FILAS_CON_ERROR if resumen['errores'] else SALIDA_OK
+
+
+def cmd_respaldo(db, args):
+    db.respaldar(args.destino)
+    return {'destino': args.destino}, SALIDA_OK
+
+
+def cmd_reconstruir(db, args):
+    db.reconstruir_ventas_diarias()
+    db.reconstruir_frecuencias()
+    db.reconstruir_indice_texto()
+    return {'reconstruido': ['ventas_diarias_producto', 'frecuencia_productos', 'productos_fts']}, SALIDA_OK
+
+
+def cmd_reporte(db, args):
+    hasta = args.hasta or date.today().isoformat()
+    desde = args.desde or (date.fromisoformat(hasta) - timedelta(days=args.dias - 1)).isoformat()
+    return db.resumen_ventas(desde, hasta, top=args.top), SALIDA_OK
+
+
+def cmd_consolidar(db, args):
+    from consolidado import consolidar
+    hasta = args.hasta or date.today().isoformat()
+    desde = args.desde or (date.fromisoformat(hasta) - timedelta(days=args.dias - 1)).isoformat()
+    resultado = consolidar(args.sucursales, desde, hasta, top=args.top,
+                           cache_path=args.cache, procesos=args.procesos)
+    return resultado, SALIDA_OK
+
+
+def cmd_mantenimiento(db, args):
+    from mantenimiento import Mantenimiento
+    tareas = Mantenimiento(db)
+    while not tareas.paso(presupuesto=1.0):
+        pass
+    informe = tareas.informe
+    codigo = SALIDA_OK if informe['integridad'] == ['ok'] else SALIDA_ERROR
+    return informe, codigo
+
+
+def _crear_parser():
+    parser = argparse.ArgumentParser(prog="barrilito", description="Tareas del minimarket sin interfaz gráfica.")
+    parser.add_argument("--db", default=DB_FILE, help="Ruta de la base de datos (por defecto la de la aplicación)")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("exportar-productos", help="Exporta los productos a Excel")
+    p.add_argument("archivo")
+    p.set_defaults(func=cmd_exportar_productos)
+
+    p = sub.add_parser("exportar-ventas", help="Exporta las ventas a Excel")
+    p.add_argument("archivo")
+    p.set_defaults(func=cmd_exportar_ventas)
+
+    p = sub.add_parser("importar", help="Importa productos desde CSV o XLSX")
+    p.add_argument("archivo")
+    p.set_defaults(func=cmd_importar)
+
+    p = sub.add_parser("respaldo", help="Copia la base de datos a otro archivo")
+    p.add_argument("destino")
+    p.set_defaults(func=cmd_respaldo)
+
+    p = sub.add_parser("reconstruir", help="Recalcula los acumulados de venta por producto y el índice de búsqueda de texto")
+    p.set_defaults(func=cmd_reconstruir)
+
+    p = sub.add_parser("reporte", help="Totales de venta de un periodo")
+    p.add_argument("--desde", help="Fecha inicial YYYY-MM-DD")
+    p.add_argument("--hasta", help="Fecha final YYYY-MM-DD (por defecto hoy)")
+    p.add_argument("--dias", type=int, default=1, help="Días hacia atrás si no se indica --desde")
+    p.add_argument("--top", type=int, default=10, help="Cantidad de productos en el ranking")
+    p.set_defaults(func=cmd_reporte)
+
+    p = sub.add_parser("mantenimiento", help="Verifica, optimiza y compacta la base de datos")
+    p.set_defaults(func=cmd_mantenimiento)
+
+    p = sub.add_parser("consolidar", help="Reporte conjunto de varias sucursales")
+    p.add_argument("sucursales", nargs="+", help="Archivos minimarket.db de cada sucursal")
+    p.add_argument("--desde", help="Fecha inicial YYYY-MM-DD")
+    p.add_argument("--hasta", help="Fecha final YYYY-MM-DD (por defecto hoy)")
+    p.add_argument("--dias", type=int, default=1, help="Días hacia atrás si no se indica --desde")
+    p.add_argument("--top", type=int, default=20, help="Cantidad de productos en el ranking")
+    p.add_argument("--cache", help="Archivo JSON donde guardar los parciales de cada sucursal")
+    p.add_argument("--procesos", type=int, help="Procesos en paralelo (por defecto uno por núcleo)")
+    p.set_defaults(func=cmd_consolidar, sin_db=True)
+
+    return parser
+
+
+def _imprimir_texto(resultado):
+    if 'por_dia' in resultado:
+        print(f"Ventas del {resultado['desde']} al {resultado['hasta']}: "
+              f"{resultado['ventas']} tickets, total ${resultado['total'] or 0:,}")
+        for suc in resultado.get('sucursales', []):
+            origen = " (caché)" if suc['desde_cache'] else ""
+            print(f"  {suc['ruta']}: {suc['ventas']} tickets, ${suc['total']:,}, margen ${suc['margen']:,}{origen}")
+        for dia in resultado['por_dia']:
+            print(f"  {dia['dia']}  {dia['ventas']:>5} tickets  ${dia['total']:,}")
+        if resultado['top_productos']:
+            print("Productos más vendidos:")
+            for prod in resultado['top_productos']:
+                print(f"  {prod['nombre']}: {prod['unidades']:g} u, ${prod['monto']:,}")
+        return
+    for clave, valor in resultado.items():
+        if isinstance(valor, list):
+            print(f"{clave}: {len(valor)}")
+            for item in valor[:20]:
+                print(f"  {item}")
+        else:
+            print(f"{clave}: {valor}")
+
+
+def main(argv=None):
+    parser = _crear_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return SALIDA_USO if e.code else SALIDA_OK
+
+    try:
+        db = None if getattr(args, 'sin_db', False) else Database(args.db)
+    except Exception as e:
+        print(f"Error: no se pudo abrir la base de datos: {e}", file=sys.stderr)
+        return SALIDA_ERROR
+
+    try:
+        resultado, codigo = args.func(db, args)
+    except Exception as e:
+        if args.json:
+            print(json.dumps({'error': str(e)}, ensure_ascii=False))
+        else:
+            print(f"Error: {e}", file=sys.stderr)
+        return SALIDA_ERROR
+    finally:
+        if db:
+            db.close()
+
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    else:
+        _imprimir_texto(resultado)
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
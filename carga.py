@@ -0,0 +1,229 @@
+# carga.py
+"""Generador de carga: N cajas simuladas (una por proceso) vendiendo contra el mismo archivo SQLite.
+
+Sirve para saber cuántas cajas aguanta una base antes de que aparezca "database is locked".
+Cada caja usa Database igual que la aplicación (registrar_venta, actualizar_venta, eliminar_venta
+y búsquedas por código). Antes de empezar, cada caja arma su guion: --operaciones operaciones con
+pausas y carros aleatorios derivados de --semilla. Las ventas a editar o eliminar se eligen por
+posición dentro del propio guion, sin mirar qué resultó de las anteriores, así que dos corridas
+con la misma semilla emiten siempre la misma secuencia aunque haya bloqueos. La duración se mide
+y se informa aparte.
+
+Uso:
+    python carga.py --cajas 4 --operaciones 500 --config delete wal [--json]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from database import Database
+
+# Configuraciones de almacenamiento a comparar
+CONFIGURACIONES = {
+    # Como abre la base la aplicación hoy
+    "delete": {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": 5000},
+    "wal": {"journal_mode": "WAL", "synchronous": "FULL", "busy_timeout": 5000},
+    "wal_normal": {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 5000},
+    # Sin espera: muestra la contención real, cada choque es un error
+    "delete_sin_espera": {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": 0},
+}
+
+# Peso de cada operación en la mezcla de una caja
+OPERACIONES = [("buscar", 60), ("registrar", 30), ("actualizar", 5), ("eliminar", 5)]
+
+
+def preparar_base(ruta, config, productos, semilla):
+    rng = random.Random(semilla)
+    db = Database(ruta)
+    db.conn.execute(f"PRAGMA journal_mode={config['journal_mode']}")
+    db.conn.executemany(
+        "INSERT INTO productos (nombre, codigo, precio_compra, precio_venta, cantidad) VALUES (?, ?, ?, ?, ?)",
+        [(f"Producto {i}", f"78{i:011d}", rng.randint(100, 5000), rng.randint(200, 9000), 1e9)
+         for i in range(productos)]
+    )
+    db.conn.commit()
+    db.close()
+
+
+def _abrir(ruta, config):
+    db = Database(ruta)
+    db.conn.execute(f"PRAGMA busy_timeout={config['busy_timeout']}")
+    db.conn.execute(f"PRAGMA synchronous={config['synchronous']}")
+    return db
+
+
+def _es_bloqueo(error):
+    texto = str(error).lower()
+    return "locked" in texto or "busy" in texto
+
+
+def guion(indice, semilla, operaciones, productos, pausa_media):
+    """Secuencia fija de operaciones de una caja: (pausa, operacion, venta, carro).
+
+    venta es la posición de la venta dentro del guion (la n-ésima operación "registrar"), o None.
+    """
+    rng = random.Random(semilla * 1000 + indice)
+    nombres = [nombre for nombre, _ in OPERACIONES]
+    pesos = [peso for _, peso in OPERACIONES]
+    vivas = []          # Ventas del guion aún no eliminadas por el propio guion
+    registradas = 0
+    pasos = []
+    for _ in range(operaciones):
+        pausa = rng.expovariate(1 / pausa_media)
+        operacion = rng.choices(nombres, pesos)[0]
+        if operacion in ("actualizar", "eliminar") and not vivas:
+            operacion = "registrar"
+        carro = [
+            (rng.randrange(productos) + 1, round(rng.choice([1, 1, 1, 2, 3, rng.uniform(0.1, 2)]), 3))
+            for _ in range(max(1, int(rng.lognormvariate(1.3, 0.7))))
+        ]
+        venta = None
+        if operacion == "buscar":
+            carro = [(rng.randrange(productos), None)]
+        elif operacion == "registrar":
+            venta = registradas
+            registradas += 1
+            vivas.append(venta)
+        elif operacion == "actualizar":
+            venta = rng.choice(vivas)
+        else:
+            venta = vivas.pop(rng.randrange(len(vivas)))
+        pasos.append((pausa, operacion, venta, carro))
+    return pasos
+
+
+def caja(indice, ruta, config, operaciones, semilla, productos, pausa_media, inicio):
+    """Una caja simulada; devuelve latencias (ms) por operación, errores y segundos usados."""
+    pasos = guion(indice, semilla, operaciones, productos, pausa_media)
+    latencias = {nombre: [] for nombre, _ in OPERACIONES}
+    errores = {"bloqueo": 0, "otros": 0, "omitidas": 0}
+    ventas = {}         # Posición en el guion -> venta_id real
+
+    db = _abrir(ruta, config)
+    # Todas las cajas arrancan a la vez
+    time.sleep(max(inicio - time.time(), 0))
+    comienzo = time.perf_counter()
+    try:
+        for pausa, operacion, venta, carro in pasos:
+            time.sleep(pausa)
+            if operacion in ("actualizar", "eliminar") and venta not in ventas:
+                # La venta no llegó a registrarse (bloqueo): se cuenta aparte y el guion sigue igual
+                errores["omitidas"] += 1
+                continue
+            t0 = time.perf_counter()
+            try:
+                if operacion == "buscar":
+                    db.obtener_producto_por_codigo(f"78{carro[0][0]:011d}")
+                elif operacion == "registrar":
+                    items = [{'producto_id': pid, 'cantidad': cant, 'precio_unitario': 1000,
+                              'subtotal': round(cant * 1000)} for pid, cant in carro]
+                    ventas[venta] = db.registrar_venta(items)
+                elif operacion == "actualizar":
+                    items = [{'producto_id': pid, 'cantidad': cant, 'precio_unitario': 1000} for pid, cant in carro]
+                    db.actualizar_venta(ventas[venta], items)
+                else:
+                    db.eliminar_venta(ventas.pop(venta))
+            except sqlite3.OperationalError as e:
+                db.conn.rollback()
+                errores["bloqueo" if _es_bloqueo(e) else "otros"] += 1
+                continue
+            latencias[operacion].append((time.perf_counter() - t0) * 1000)
+    finally:
+        db.close()
+    return {"latencias": latencias, "errores": errores, "segundos": time.perf_counter() - comienzo}
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(round(p * (len(valores) - 1))))]
+
+
+def correr(nombre_config, cajas, operaciones, semilla, productos=2000, pausa_media=0.2, carpeta=None):
+    config = CONFIGURACIONES[nombre_config]
+    carpeta = carpeta or tempfile.mkdtemp(prefix="carga_")
+    ruta = os.path.join(carpeta, f"carga_{nombre_config}.db")
+    for sufijo in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+    preparar_base(ruta, config, productos, semilla)
+
+    inicio = time.time() + 1.0  # Margen para que arranquen todos los procesos
+    with ProcessPoolExecutor(max_workers=cajas) as pool:
+        futuros = [
+            pool.submit(caja, i, ruta, config, operaciones, semilla, productos, pausa_media, inicio)
+            for i in range(cajas)
+        ]
+        resultados = [f.result() for f in futuros]
+
+    por_operacion = {}
+    total = 0
+    for nombre, _ in OPERACIONES:
+        valores = [ms for r in resultados for ms in r["latencias"][nombre]]
+        total += len(valores)
+        por_operacion[nombre] = {
+            "cantidad": len(valores),
+            "p50_ms": _percentil(valores, 0.50),
+            "p99_ms": _percentil(valores, 0.99),
+        }
+    duracion = max(r["segundos"] for r in resultados)
+    return {
+        "config": nombre_config,
+        **config,
+        "cajas": cajas,
+        "operaciones_por_caja": operaciones,
+        "semilla": semilla,
+        # Lo que tardó la caja más lenta; no forma parte del guion
+        "duracion_s": duracion,
+        "operaciones_por_s": total / duracion if duracion else None,
+        "errores_bloqueo": sum(r["errores"]["bloqueo"] for r in resultados),
+        "errores_otros": sum(r["errores"]["otros"] for r in resultados),
+        "omitidas": sum(r["errores"]["omitidas"] for r in resultados),
+        "operaciones": por_operacion,
+    }
+
+
+def _imprimir(reporte):
+    print(f"[{reporte['config']}] journal={reporte['journal_mode']} synchronous={reporte['synchronous']} "
+          f"busy_timeout={reporte['busy_timeout']} ms — {reporte['cajas']} cajas × "
+          f"{reporte['operaciones_por_caja']} operaciones en {reporte['duracion_s']:.1f} s")
+    print(f"  {reporte['operaciones_por_s'] or 0:.1f} op/s, bloqueos: {reporte['errores_bloqueo']}, "
+          f"otros errores: {reporte['errores_otros']}, omitidas por venta no registrada: {reporte['omitidas']}")
+    for nombre, datos in reporte["operaciones"].items():
+        if datos["cantidad"]:
+            print(f"  {nombre:<11} n={datos['cantidad']:<6} p50={datos['p50_ms']:.2f} ms  p99={datos['p99_ms']:.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de varias cajas sobre una misma base SQLite.")
+    parser.add_argument("--cajas", type=int, default=4, help="Cajas simuladas (procesos)")
+    parser.add_argument("--operaciones", type=int, default=500, help="Operaciones del guion de cada caja")
+    parser.add_argument("--semilla", type=int, default=1, help="Semilla para repetir la misma secuencia")
+    parser.add_argument("--productos", type=int, default=2000, help="Productos en el catálogo de prueba")
+    parser.add_argument("--pausa", type=float, default=0.2, help="Pausa media entre operaciones de una caja (s)")
+    parser.add_argument("--config", nargs="+", choices=sorted(CONFIGURACIONES), default=["delete", "wal"])
+    parser.add_argument("--carpeta", help="Carpeta para las bases de prueba (por defecto una temporal)")
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args(argv)
+
+    reportes = [
+        correr(nombre, args.cajas, args.operaciones, args.semilla, args.productos, args.pausa, args.carpeta)
+        for nombre in args.config
+    ]
+    if args.json:
+        print(json.dumps(reportes, ensure_ascii=False, indent=2))
+    else:
+        for reporte in reportes:
+            _imprimir(reporte)
+    return 1 if any(r["errores_bloqueo"] for r in reportes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
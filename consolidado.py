@@ -0,0 +1,172 @@
+# consolidado.py
+"""Reporte consolidado de varias sucursales, cada una con su propio minimarket.db.
+
+Cada sucursal se agrega en un proceso aparte y los parciales se guardan en caché por archivo.
+Como PRAGMA data_version solo sirve dentro de una misma conexión, la caché usa su equivalente
+persistente: el contador de cambios de la cabecera de SQLite más tamaño y fecha del archivo
+(y de su -wal, si existe). Si nada de eso cambió, la sucursal no se vuelve a leer.
+"""
+import json
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from urllib.request import pathname2url
+
+
+def firma_archivo(ruta):
+    """Identifica una versión concreta del archivo de base de datos."""
+    with open(ruta, "rb") as f:
+        cabecera = f.read(100)
+    contador = int.from_bytes(cabecera[24:28], "big") if len(cabecera) >= 28 else 0
+    firma = [contador]
+    for archivo in (ruta, ruta + "-wal"):
+        if os.path.exists(archivo):
+            st = os.stat(archivo)
+            firma += [st.st_size, st.st_mtime_ns]
+    return firma
+
+
+def agregar_sucursal(ruta, desde, hasta):
+    """Totales por día y por producto de una sucursal (se ejecuta en un proceso del pool)."""
+    conn = sqlite3.connect(f"file:{pathname2url(ruta)}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    rango = (f"{desde} 00:00:00", f"{hasta} 23:59:59")
+    try:
+        cur = conn.cursor()
+        cur.execute('''
+            SELECT date(fecha) AS dia, COUNT(*) AS ventas, SUM(total) AS total
+            FROM ventas
+            WHERE fecha BETWEEN ? AND ?
+            GROUP BY dia
+        ''', rango)
+        por_dia = {row['dia']: [row['ventas'], row['total']] for row in cur.fetchall()}
+
+        # Los id de producto no coinciden entre sucursales: se agrupa por código, o por nombre si no tiene.
+        # El costo usa el precio de compra actual del producto en la sucursal.
+        cur.execute('''
+            SELECT COALESCE(NULLIF(p.codigo, ''), d.nombre_producto) AS clave,
+                   MAX(d.nombre_producto) AS nombre,
+                   SUM(d.cantidad) AS unidades,
+                   SUM(d.subtotal) AS monto,
+                   SUM(d.cantidad * COALESCE(p.precio_compra, 0)) AS costo
+            FROM detalles_venta d
+            JOIN ventas v ON v.id = d.venta_id
+            LEFT JOIN productos p ON p.id = d.producto_id
+            WHERE v.fecha BETWEEN ? AND ?
+            GROUP BY clave
+        ''', rango)
+        productos = {
+            row['clave']: {'nombre': row['nombre'], 'unidades': row['unidades'],
+                           'monto': row['monto'], 'costo': row['costo']}
+            for row in cur.fetchall()
+        }
+    finally:
+        conn.close()
+    return {'por_dia': por_dia, 'productos': productos}
+
+
+def _leer_cache(cache_path):
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_cache(cache_path, cache):
+    if not cache_path:
+        return
+    temporal = cache_path + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(temporal, cache_path)
+
+
+def consolidar(rutas, desde, hasta, top=20, cache_path=None, procesos=None):
+    """Reporte de toda la cadena entre dos fechas 'YYYY-MM-DD'.
+
+    Solo las sucursales cuyo archivo o rango de fechas cambió desde la última vez se leen de nuevo,
+    en paralelo. El caché guarda una sola entrada por sucursal (la del último rango pedido).
+    """
+    rutas = [os.path.abspath(r) for r in rutas]
+    cache = _leer_cache(cache_path)
+    parciales = {}
+    pendientes = []
+    for ruta in rutas:
+        firma = firma_archivo(ruta)
+        guardado = cache.get(ruta)
+        if guardado and guardado.get('rango') == [desde, hasta] and guardado['firma'] == firma:
+            parciales[ruta] = guardado['parcial']
+        else:
+            pendientes.append((ruta, firma))
+
+    if len(pendientes) == 1:
+        ruta, _ = pendientes[0]
+        resultados = [agregar_sucursal(ruta, desde, hasta)]
+    elif pendientes:
+        procesos = procesos or min(len(pendientes), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(
+                agregar_sucursal,
+                [ruta for ruta, _ in pendientes],
+                [desde] * len(pendientes),
+                [hasta] * len(pendientes),
+            ))
+    else:
+        resultados = []
+
+    for (ruta, firma), parcial in zip(pendientes, resultados):
+        parciales[ruta] = parcial
+        cache[ruta] = {'firma': firma, 'rango': [desde, hasta], 'parcial': parcial}
+    if pendientes:
+        # Descarta entradas del formato anterior (una por ruta y rango), que crecían sin límite
+        cache = {clave: valor for clave, valor in cache.items() if 'rango' in valor}
+        _guardar_cache(cache_path, cache)
+
+    return _unir_parciales(rutas, parciales, {ruta for ruta, _ in pendientes}, desde, hasta, top)
+
+
+def _unir_parciales(rutas, parciales, leidas, desde, hasta, top):
+    por_dia = {}
+    productos = {}
+    sucursales = []
+    for ruta in rutas:
+        parcial = parciales[ruta]
+        ventas = total = 0
+        for dia, (n, monto) in parcial['por_dia'].items():
+            acumulado = por_dia.setdefault(dia, [0, 0])
+            acumulado[0] += n
+            acumulado[1] += monto
+            ventas += n
+            total += monto
+        costo = 0
+        for clave, prod in parcial['productos'].items():
+            acumulado = productos.setdefault(clave, {'nombre': prod['nombre'], 'unidades': 0, 'monto': 0, 'costo': 0})
+            acumulado['unidades'] += prod['unidades']
+            acumulado['monto'] += prod['monto']
+            acumulado['costo'] += prod['costo']
+            costo += prod['costo']
+        sucursales.append({
+            'ruta': ruta,
+            'ventas': ventas,
+            'total': total,
+            'margen': total - costo,
+            'desde_cache': ruta not in leidas,
+        })
+
+    ranking = sorted(productos.values(), key=lambda p: p['monto'], reverse=True)[:top]
+    for prod in ranking:
+        prod['margen'] = prod['monto'] - prod['costo']
+
+    return {
+        'desde': desde,
+        'hasta': hasta,
+        'ventas': sum(s['ventas'] for s in sucursales),
+        'total': sum(s['total'] for s in sucursales),
+        'margen': sum(s['margen'] for s in sucursales),
+        'sucursales': sucursales,
+        'por_dia': [{'dia': dia, 'ventas': n, 'total': monto} for dia, (n, monto) in sorted(por_dia.items())],
+        'top_productos': ranking,
+    }
@@ -1,29 +1,184 @@
 # database.py
+import csv
+import re
+import json
 import sqlite3
-from datetime import datetime
+import unicodedata
+from datetime import datetime, timedelta
 
 
 import sys
 import os
+import shutil
 
-def get_db_path(filename):
-    if getattr(sys, 'frozen', False):
-        # Ejecutable creado por PyInstaller
-        base_path = sys._MEIPASS
+APP_NOMBRE = "Barrilito"
+
+
+def get_data_dir():
+    """Carpeta de la base en uso: junto al código en desarrollo, una carpeta por usuario en el ejecutable."""
+    if not getattr(sys, 'frozen', False):
+        return os.path.dirname(os.path.abspath(__file__))
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.environ.get("APPDATA") or os.path.expanduser("~")
     else:
-        # Ejecución en desarrollo
-        base_path = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(base_path, filename)
+        base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    carpeta = os.path.join(base, APP_NOMBRE)
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+
+def get_db_path(filename):
+    path = os.path.join(get_data_dir(), filename)
+    if getattr(sys, 'frozen', False) and not os.path.exists(path):
+        # Primer arranque del ejecutable: se copia la base de plantilla incluida por PyInstaller.
+        # Después se usa siempre la copia del usuario, nunca la del paquete.
+        plantilla = os.path.join(sys._MEIPASS, filename)
+        if os.path.exists(plantilla):
+            shutil.copy2(plantilla, path)
+    return path
 
 
 DB_FILE = get_db_path("minimarket.db")
 
+# Tipos de cambio que Database avisa a sus suscriptores
+CAMBIO_PRODUCTOS = "productos"
+CAMBIO_VENTAS = "ventas"
+
+
+def _escapar_like(texto):
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# Fila de ventas_diarias_producto sin ventas (restas de ediciones y anulaciones; tolera residuos de REAL)
+_ACUMULADO_EN_CERO = "abs(unidades) < 1e-9 AND monto = 0"
+
+COLUMNAS_OBLIGATORIAS = ("nombre", "precio_compra", "precio_venta")
+
+
+def _normalizar_encabezado(texto):
+    # "Código" -> "codigo", "Precio Venta" -> "precio_venta"
+    texto = unicodedata.normalize("NFKD", str(texto or ""))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return texto.strip().lower().replace(" ", "_").replace(".", "")
+
+
+def _revisar_encabezados(encabezados, avisos):
+    faltan = [col for col in COLUMNAS_OBLIGATORIAS if col not in encabezados]
+    if faltan:
+        raise ValueError(f"faltan columnas: {', '.join(faltan)} (encabezados leídos: {', '.join(map(str, encabezados))})")
+    if "codigo" not in encabezados:
+        avisos.append("El archivo no tiene columna codigo: todas las filas se agregan como productos nuevos")
+
+
+def _leer_filas_archivo(file_path, avisos):
+    """Lee un CSV o XLSX fila a fila y entrega (numero_fila, dict) sin cargar el archivo completo.
+
+    Antes de la primera fila revisa los encabezados; los avisos se agregan a la lista `avisos`.
+    """
+    if file_path.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            filas = wb.active.iter_rows(values_only=True)
+            encabezados = [_normalizar_encabezado(h) for h in next(filas, ())]
+            _revisar_encabezados(encabezados, avisos)
+            for num_fila, valores in enumerate(filas, start=2):
+                if valores is None or all(v is None or v == "" for v in valores):
+                    continue
+                yield num_fila, dict(zip(encabezados, valores))
+        finally:
+            wb.close()
+    else:
+        with open(file_path, newline="", encoding="utf-8-sig") as f:
+            muestra = f.read(4096)
+            f.seek(0)
+            try:
+                dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+            except csv.Error:
+                dialecto = csv.excel
+            lector = csv.reader(f, dialecto)
+            encabezados = [_normalizar_encabezado(h) for h in next(lector, [])]
+            _revisar_encabezados(encabezados, avisos)
+            for num_fila, valores in enumerate(lector, start=2):
+                if not any(v.strip() for v in valores):
+                    continue
+                yield num_fila, dict(zip(encabezados, valores))
+
+
+_MILES = re.compile(r"^\d{1,3}([.,]\d{3})+$")
+
+
+def _a_numero(valor, campo, entero, opcional=False):
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        if opcional:
+            return None
+        raise ValueError(f"falta {campo}")
+    if isinstance(valor, str):
+        valor = valor.strip().replace("$", "").replace(" ", "")
+        if entero and _MILES.match(valor):
+            # Precios en pesos con separador de miles: "1.990" o "1,990"
+            valor = valor.replace(".", "").replace(",", "")
+        valor = valor.replace(",", ".")
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"{campo} no es un número: {valor!r}")
+    if numero < 0:
+        raise ValueError(f"{campo} no puede ser negativo")
+    if entero:
+        if not numero.is_integer():
+            raise ValueError(f"{campo} debe ser entero: {valor!r}")
+        return int(numero)
+    return numero
+
+
+def _validar_fila_producto(fila):
+    nombre = str(fila.get("nombre") or "").strip()
+    if not nombre:
+        raise ValueError("falta nombre")
+    codigo = fila.get("codigo")
+    if isinstance(codigo, float) and codigo.is_integer():
+        # Excel guarda los códigos de barra como números
+        codigo = int(codigo)
+    codigo = str(codigo).strip() if codigo is not None else ""
+    return {
+        "nombre": nombre,
+        "codigo": codigo or None,
+        "precio_compra": _a_numero(fila.get("precio_compra"), "precio_compra", entero=True),
+        "precio_venta": _a_numero(fila.get("precio_venta"), "precio_venta", entero=True),
+        # Sin cantidad (p. ej. una lista de precios del proveedor) no se toca el stock contado
+        "cantidad": _a_numero(fila.get("cantidad"), "cantidad", entero=False, opcional=True),
+    }
+
+
 class Database:
     def __init__(self, db_file=DB_FILE):
         self.conn = sqlite3.connect(db_file)
         self.conn.row_factory = sqlite3.Row  # Para acceder por nombre
+        self._suscriptores = []
+        if self.conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+            # Base nueva: permite devolver espacio libre de a poco (ver vaciar_paginas_libres)
+            self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
         self._create_tables()
 
+    # ---- Aviso de cambios ----
+
+    def suscribir(self, callback):
+        """Registra callback(tipo, ids), llamado tras cada commit que modifica productos o ventas.
+
+        tipo es CAMBIO_PRODUCTOS o CAMBIO_VENTAS; ids es el conjunto de ids afectados,
+        o None si cambiaron demasiadas filas y conviene recargar todo.
+        """
+        self._suscriptores.append(callback)
+
+    def _notificar(self, tipo, ids):
+        for callback in list(self._suscriptores):
+            callback(tipo, ids)
+
+    def version_datos(self):
+        """Valor que cambia cuando otra conexión (otro proceso) confirma cambios en la base."""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
     def _create_tables(self):
         """Crea las tablas si no existen."""
         cursor = self.conn.cursor()
@@ -60,31 +215,184 @@ class Database:
                 -- NO hacemos referencia a productos para que no dependa del producto
             );
         ''')
+        # Registro de ajustes de stock (conteos físicos)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ajustes_inventario (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fecha TEXT NOT NULL,
+                producto_id INTEGER NOT NULL,
+                nombre_producto TEXT NOT NULL,
+                cantidad_anterior REAL NOT NULL,
+                cantidad_nueva REAL NOT NULL,
+                motivo TEXT
+            )
+        ''')
+        # Carros aparcados en la caja (items en JSON), para retomarlos después
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tickets_aparcados (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fecha TEXT NOT NULL,
+                etiqueta TEXT NOT NULL,
+                items TEXT NOT NULL
+            )
+        ''')
+        # Unidades y monto vendidos por producto y día, mantenidos al registrar/editar/eliminar ventas
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='ventas_diarias_producto'")
+        reconstruir_diarias = cursor.fetchone() is None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ventas_diarias_producto (
+                producto_id INTEGER NOT NULL,
+                dia TEXT NOT NULL,
+                unidades REAL NOT NULL,
+                monto INTEGER NOT NULL,
+                PRIMARY KEY (producto_id, dia)
+            ) WITHOUT ROWID
+        ''')
+        # Cuántas ventas incluyen cada producto, para las teclas rápidas; fijo = posición si está fijado
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='frecuencia_productos'")
+        reconstruir_frecuencias = cursor.fetchone() is None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS frecuencia_productos (
+                producto_id INTEGER PRIMARY KEY,
+                veces INTEGER NOT NULL DEFAULT 0,
+                fijo INTEGER
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_frecuencia_veces ON frecuencia_productos(veces)')
+        # Columnas agregadas en versiones posteriores
+        if 'stock_minimo' not in self._columnas(cursor, 'productos'):
+            cursor.execute("ALTER TABLE productos ADD COLUMN stock_minimo REAL NOT NULL DEFAULT 0")
+        if 'plu' not in self._columnas(cursor, 'productos'):
+            cursor.execute("ALTER TABLE productos ADD COLUMN plu TEXT")
+        # Líneas de etiqueta con precio: el subtotal es lo impreso y no se recalcula al editar
+        if 'precio_fijo' not in self._columnas(cursor, 'detalles_venta'):
+            cursor.execute("ALTER TABLE detalles_venta ADD COLUMN precio_fijo INTEGER NOT NULL DEFAULT 0")
+        # Índice de texto por trigramas para buscar nombres y códigos que contienen un texto
+        self._indice_texto = self._crear_indice_texto(cursor)
+        # Índice para búsquedas por código (escáner e importación masiva)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_productos_codigo ON productos(codigo)')
+        # Selector de productos: prefijo por rango y recorrido ordenado por nombre sin distinguir mayúsculas
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos(nombre COLLATE NOCASE, id)')
+        # PLU de balanza (etiquetas de peso/precio)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_productos_plu ON productos(plu)')
+        # Detalle de una venta (ver, editar y eliminar ventas)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_detalles_venta ON detalles_venta(venta_id)')
+        # Índice inverso: de un producto a las ventas que lo incluyen
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_detalles_producto ON detalles_venta(producto_id, venta_id)')
+        # Índice para reportes por periodo
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas(fecha)')
+        # Índice parcial: solo contiene los productos bajo su stock mínimo
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_productos_bajo_stock
+            ON productos(nombre) WHERE cantidad <= stock_minimo
+        ''')
         self.conn.commit()
+        if reconstruir_diarias:
+            self.reconstruir_ventas_diarias()
+        if reconstruir_frecuencias:
+            self.reconstruir_frecuencias()
 
-    # CRUD Productos
-    def agregar_producto(self, nombre, codigo, precio_compra, precio_venta, cantidad):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO productos (nombre, codigo, precio_compra, precio_venta, cantidad)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (nombre, codigo, precio_compra, precio_venta, cantidad))
+    @staticmethod
+    def _crear_indice_texto(cursor):
+        """Crea productos_fts (FTS5, trigramas) y sus triggers. Devuelve False si este SQLite no lo soporta."""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name='productos_fts'")
+        if cursor.fetchone():
+            return True
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE productos_fts USING fts5(
+                    nombre, codigo, content='productos', content_rowid='id', tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            return False
+        # Solo cambios de nombre o código tocan el índice; descontar stock no
+        cursor.executescript('''
+            CREATE TRIGGER productos_fts_ai AFTER INSERT ON productos BEGIN
+                INSERT INTO productos_fts (rowid, nombre, codigo) VALUES (new.id, new.nombre, new.codigo);
+            END;
+            CREATE TRIGGER productos_fts_ad AFTER DELETE ON productos BEGIN
+                INSERT INTO productos_fts (productos_fts, rowid, nombre, codigo)
+                VALUES ('delete', old.id, old.nombre, old.codigo);
+            END;
+            CREATE TRIGGER productos_fts_au AFTER UPDATE OF nombre, codigo ON productos
+            WHEN old.nombre IS NOT new.nombre OR old.codigo IS NOT new.codigo BEGIN
+                INSERT INTO productos_fts (productos_fts, rowid, nombre, codigo)
+                VALUES ('delete', old.id, old.nombre, old.codigo);
+                INSERT INTO productos_fts (rowid, nombre, codigo) VALUES (new.id, new.nombre, new.codigo);
+            END;
+        ''')
+        cursor.execute("INSERT INTO productos_fts (productos_fts) VALUES ('rebuild')")
+        return True
+
+    @staticmethod
+    def _columnas(cursor, tabla):
+        cursor.execute(f"PRAGMA table_info({tabla})")
+        return {row['name'] for row in cursor.fetchall()}
+
+    def _sumar_ventas_diarias(self, cursor, dia, lineas, signo=1):
+        """Suma (o resta con signo=-1) las líneas {'producto_id', 'cantidad', 'subtotal'} al día indicado."""
+        cursor.executemany('''
+            INSERT INTO ventas_diarias_producto (producto_id, dia, unidades, monto)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(producto_id, dia) DO UPDATE SET
+                unidades = unidades + excluded.unidades,
+                monto = monto + excluded.monto
+        ''', [
+            (l['producto_id'], dia, signo * l['cantidad'], signo * l['subtotal'])
+            for l in lineas
+        ])
+        if signo < 0:
+            # Filas que quedaron en cero por una edición: se borran para que no aparezcan en reportes
+            cursor.executemany(
+                f"DELETE FROM ventas_diarias_producto WHERE producto_id = ? AND dia = ? AND {_ACUMULADO_EN_CERO}",
+                {(l['producto_id'], dia) for l in lineas}
+            )
+
+    def reconstruir_ventas_diarias(self):
+        """Recalcula ventas_diarias_producto desde detalles_venta (solo para bases antiguas o reparaciones)."""
+        cur = self.conn.cursor()
+        cur.execute("DELETE FROM ventas_diarias_producto")
+        cur.execute('''
+            INSERT INTO ventas_diarias_producto (producto_id, dia, unidades, monto)
+            SELECT d.producto_id, date(v.fecha), SUM(d.cantidad), SUM(d.subtotal)
+            FROM detalles_venta d
+            JOIN ventas v ON v.id = d.venta_id
+            GROUP BY d.producto_id, date(v.fecha)
+        ''')
         self.conn.commit()
 
-    def actualizar_producto(self, producto_id, nombre, codigo, precio_compra, precio_venta, cantidad):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            UPDATE productos SET nombre=?, codigo=?, precio_compra=?, precio_venta=?, cantidad=?
-            WHERE id=?
-        ''', (nombre, codigo, precio_compra, precio_venta, cantidad, producto_id))
+    def _sumar_frecuencias(self, cursor, producto_ids, signo=1):
+        cursor.executemany('''
+            INSERT INTO frecuencia_productos (producto_id, veces) VALUES (?, ?)
+            ON CONFLICT(producto_id) DO UPDATE SET veces = veces + excluded.veces
+        ''', [(producto_id, signo) for producto_id in set(producto_ids)])
+
+    def reconstruir_indice_texto(self):
+        if self._indice_texto:
+            self.conn.execute("INSERT INTO productos_fts (productos_fts) VALUES ('rebuild')")
+            self.conn.commit()
+
+    def reconstruir_frecuencias(self):
+        """Recalcula frecuencia_productos desde detalles_venta, conservando los productos fijados."""
+        cur = self.conn.cursor()
+        cur.execute("UPDATE frecuencia_productos SET veces = 0")
+        cur.execute('''
+            INSERT INTO frecuencia_productos (producto_id, veces)
+            SELECT producto_id, COUNT(DISTINCT venta_id) FROM detalles_venta GROUP BY producto_id
+            ON CONFLICT(producto_id) DO UPDATE SET veces = excluded.veces
+        ''')
         self.conn.commit()
 
     def actualizar_venta(self, venta_id, items_actualizados):
         cursor = self.conn.cursor()
 
         # Obtener detalles actuales
-        cursor.execute("SELECT producto_id, cantidad FROM detalles_venta WHERE venta_id=?", (venta_id,))
+        cursor.execute("SELECT producto_id, cantidad, subtotal FROM detalles_venta WHERE venta_id=?", (venta_id,))
         detalles_anteriores = cursor.fetchall()
+        cursor.execute("SELECT date(fecha) FROM ventas WHERE id=?", (venta_id,))
+        dia = cursor.fetchone()[0]
+        self._sumar_ventas_diarias(cursor, dia, detalles_anteriores, signo=-1)
 
         # Revertir stock anterior
         for item in detalles_anteriores:
@@ -98,11 +406,17 @@ class Database:
         cursor.execute("DELETE FROM detalles_venta WHERE venta_id=?", (venta_id,))
 
         total_nuevo = 0
+        lineas_nuevas = []
 
         # Insertar nuevos detalles y descontar stock
         for item in items_actualizados:
-            subtotal = item['cantidad'] * item['precio_unitario']
+            # Las líneas de etiqueta con precio conservan el monto impreso
+            if item.get('precio_fijo'):
+                subtotal = item['subtotal']
+            else:
+                subtotal = item['cantidad'] * item['precio_unitario']
             total_nuevo += subtotal
+            lineas_nuevas.append({'producto_id': item['producto_id'], 'cantidad': item['cantidad'], 'subtotal': subtotal})
 
             # obtenemos de nuevo el nombre antes de insertar
             prod = self.obtener_producto_por_id(item['producto_id'])
@@ -111,8 +425,8 @@ class Database:
             cursor.execute(
                 '''
                 INSERT INTO detalles_venta
-                (venta_id, producto_id, nombre_producto, cantidad, precio_unitario, subtotal)
-                VALUES (?, ?, ?, ?, ?, ?)
+                (venta_id, producto_id, nombre_producto, cantidad, precio_unitario, subtotal, precio_fijo)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
                 ''',
                 (
                 venta_id,
@@ -120,7 +434,8 @@ class Database:
                 nombre,
                 item['cantidad'],
                 item['precio_unitario'],
-                subtotal
+                subtotal,
+                bool(item.get('precio_fijo'))
                 )
             )
 
@@ -130,33 +445,106 @@ class Database:
                 (item['cantidad'], item['producto_id'])
             )
 
+        self._sumar_ventas_diarias(cursor, dia, lineas_nuevas)
+        self._sumar_frecuencias(cursor, [item['producto_id'] for item in detalles_anteriores], signo=-1)
+        self._sumar_frecuencias(cursor, [item['producto_id'] for item in items_actualizados])
+
         # Actualizar total en cabecera
         cursor.execute("UPDATE ventas SET total = ? WHERE id = ?", (total_nuevo, venta_id))
 
         self.conn.commit()
+        productos = {item['producto_id'] for item in detalles_anteriores}
+        productos.update(item['producto_id'] for item in items_actualizados)
+        self._notificar(CAMBIO_PRODUCTOS, productos)
+        self._notificar(CAMBIO_VENTAS, {venta_id})
 
 
     def eliminar_venta(self, venta_id):
-        cursor = self.conn.cursor()
+        self.eliminar_ventas([venta_id])
 
-        # Obtener detalle de la venta
-        cursor.execute("SELECT producto_id, cantidad FROM detalles_venta WHERE venta_id=?", (venta_id,))
-        detalles = cursor.fetchall()
+    def eliminar_ventas(self, venta_ids):
+        """Elimina varias ventas en una sola transacción y devuelve su stock. Retorna cuántas se eliminaron.
 
-        # Devolver stock
-        for item in detalles:
-            cursor.execute(
-                "UPDATE productos SET cantidad = cantidad + ? WHERE id = ?",
-                (item["cantidad"], item["producto_id"])
+        El stock y el acumulado diario se corrigen con un UPDATE por tabla, con las cantidades
+        ya sumadas por producto, en vez de una sentencia por línea de detalle.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS ventas_a_eliminar (id INTEGER PRIMARY KEY)")
+        try:
+            # Reserva la escritura antes de leer: en WAL, pasar de lectura a escritura dentro de una
+            # transacción falla al tiro con "database is locked" (busy_timeout no aplica)
+            if not self.conn.in_transaction:
+                cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("DELETE FROM ventas_a_eliminar")
+            cursor.executemany(
+                "INSERT OR IGNORE INTO ventas_a_eliminar (id) VALUES (?)",
+                [(venta_id,) for venta_id in venta_ids]
             )
+            cursor.execute('''
+                SELECT DISTINCT producto_id FROM detalles_venta
+                WHERE venta_id IN (SELECT id FROM ventas_a_eliminar)
+            ''')
+            productos = {row[0] for row in cursor.fetchall()}
 
-        # Eliminar detalles
-        cursor.execute("DELETE FROM detalles_venta WHERE venta_id=?", (venta_id,))
-        # Eliminar cabecera
-        cursor.execute("DELETE FROM ventas WHERE id=?", (venta_id,))
+            # Devolver stock
+            cursor.execute('''
+                UPDATE productos SET cantidad = productos.cantidad + r.total
+                FROM (
+                    SELECT producto_id, SUM(cantidad) AS total
+                    FROM detalles_venta
+                    WHERE venta_id IN (SELECT id FROM ventas_a_eliminar)
+                    GROUP BY producto_id
+                ) AS r
+                WHERE productos.id = r.producto_id
+            ''')
+            # Descontar del acumulado diario por producto
+            cursor.execute('''
+                UPDATE ventas_diarias_producto
+                SET unidades = ventas_diarias_producto.unidades - r.unidades,
+                    monto = ventas_diarias_producto.monto - r.monto
+                FROM (
+                    SELECT d.producto_id, date(v.fecha) AS dia,
+                           SUM(d.cantidad) AS unidades, SUM(d.subtotal) AS monto
+                    FROM detalles_venta d
+                    JOIN ventas v ON v.id = d.venta_id
+                    WHERE d.venta_id IN (SELECT id FROM ventas_a_eliminar)
+                    GROUP BY d.producto_id, dia
+                ) AS r
+                WHERE ventas_diarias_producto.producto_id = r.producto_id
+                  AND ventas_diarias_producto.dia = r.dia
+            ''')
+            cursor.execute(f'''
+                DELETE FROM ventas_diarias_producto
+                WHERE {_ACUMULADO_EN_CERO} AND producto_id IN (
+                    SELECT producto_id FROM detalles_venta
+                    WHERE venta_id IN (SELECT id FROM ventas_a_eliminar)
+                )
+            ''')
 
-        self.conn.commit()
+            # Descontar de la frecuencia de cada producto
+            cursor.execute('''
+                UPDATE frecuencia_productos SET veces = frecuencia_productos.veces - r.ventas
+                FROM (
+                    SELECT producto_id, COUNT(DISTINCT venta_id) AS ventas
+                    FROM detalles_venta
+                    WHERE venta_id IN (SELECT id FROM ventas_a_eliminar)
+                    GROUP BY producto_id
+                ) AS r
+                WHERE frecuencia_productos.producto_id = r.producto_id
+            ''')
 
+            # Eliminar detalles y cabeceras
+            cursor.execute("DELETE FROM detalles_venta WHERE venta_id IN (SELECT id FROM ventas_a_eliminar)")
+            cursor.execute("DELETE FROM ventas WHERE id IN (SELECT id FROM ventas_a_eliminar)")
+            eliminadas = cursor.rowcount
+            cursor.execute("DELETE FROM ventas_a_eliminar")
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        self._notificar(CAMBIO_PRODUCTOS, productos)
+        self._notificar(CAMBIO_VENTAS, set(venta_ids))
+        return eliminadas
 
     def obtener_producto_por_codigo(self, codigo):
         cur = self.conn.cursor()
@@ -164,11 +552,12 @@ class Database:
         row = cur.fetchone()
         return dict(row) if row else None
 
+    def obtener_producto_por_plu(self, plu):
+        cur = self.conn.cursor()
+        cur.execute("SELECT * FROM productos WHERE plu=?", (plu,))
+        row = cur.fetchone()
+        return dict(row) if row else None
 
-    def eliminar_producto(self, producto_id):
-        cursor = self.conn.cursor()
-        cursor.execute('DELETE FROM productos WHERE id=?', (producto_id,))
-        self.conn.commit()
 
     def obtener_productos(self, filtro=None):
         cursor = self.conn.cursor()
@@ -183,9 +572,56 @@ class Database:
             cursor.execute('SELECT * FROM productos ORDER BY nombre ASC')
         return cursor.fetchall()
 
+    def buscar_productos(self, texto, limite=50, despues_de=None):
+        """Productos cuyo nombre o código contiene `texto`, de a `limite` por página.
+
+        Primero los que empiezan con `texto` (grupo 0), luego el resto (grupo 1), cada grupo por nombre.
+        El grupo 1 sale del índice de trigramas y solo se busca desde 3 caracteres.
+        Para la página siguiente se pasa despues_de = la última fila recibida.
+        """
+        prefijo = f"{_escapar_like(texto)}%"
+        grupo, nombre, prod_id = (0, "", 0) if despues_de is None else (
+            despues_de['grupo'], despues_de['nombre'], despues_de['id'])
+        cur = self.conn.cursor()
+        filas = []
+        if grupo == 0:
+            cur.execute('''
+                SELECT *, 0 AS grupo FROM productos
+                WHERE nombre LIKE ? ESCAPE '\\' AND (nombre COLLATE NOCASE, id) > (?, ?)
+                ORDER BY nombre COLLATE NOCASE, id
+                LIMIT ?
+            ''', (prefijo, nombre, prod_id, limite))
+            filas = [dict(row) for row in cur.fetchall()]
+            if len(filas) == limite:
+                return filas
+            nombre, prod_id = "", 0
+        if len(texto) < 3:
+            return filas
+        if self._indice_texto:
+            cur.execute('''
+                SELECT p.*, 1 AS grupo FROM productos p
+                WHERE p.id IN (SELECT rowid FROM productos_fts WHERE productos_fts MATCH ?)
+                  AND NOT p.nombre LIKE ? ESCAPE '\\'
+                  AND (p.nombre COLLATE NOCASE, p.id) > (?, ?)
+                ORDER BY p.nombre COLLATE NOCASE, p.id
+                LIMIT ?
+            ''', ('"' + texto.replace('"', '""') + '"', prefijo, nombre, prod_id, limite - len(filas)))
+        else:
+            # Sin FTS5: recorre el índice por nombre hasta juntar la página
+            contiene = f"%{_escapar_like(texto)}%"
+            cur.execute('''
+                SELECT *, 1 AS grupo FROM productos
+                WHERE (nombre LIKE ? ESCAPE '\\' OR codigo LIKE ? ESCAPE '\\')
+                  AND NOT nombre LIKE ? ESCAPE '\\'
+                  AND (nombre COLLATE NOCASE, id) > (?, ?)
+                ORDER BY nombre COLLATE NOCASE, id
+                LIMIT ?
+            ''', (contiene, contiene, prefijo, nombre, prod_id, limite - len(filas)))
+        return filas + [dict(row) for row in cur.fetchall()]
+
     # CRUD Ventas y detalles
     def registrar_venta(self, items):
-        """items: lista de dicts {'producto_id', 'cantidad', 'precio_unitario', 'subtotal'}"""
+        """items: lista de dicts {'producto_id', 'cantidad', 'precio_unitario', 'subtotal'} y opcional 'precio_fijo'"""
         cursor = self.conn.cursor()
         total = sum(item['subtotal'] for item in items)
         fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -198,21 +634,27 @@ class Database:
             nombre_producto = prod['nombre'] if prod else "Producto eliminado"
             cursor.execute('''
                 INSERT INTO detalles_venta 
-                (venta_id, producto_id, nombre_producto, cantidad, precio_unitario, subtotal)
-                VALUES (?, ?, ?, ?, ?, ?)
+                (venta_id, producto_id, nombre_producto, cantidad, precio_unitario, subtotal, precio_fijo)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', (
                 venta_id,
                 item['producto_id'],
                 nombre_producto,
                 item['cantidad'],
                 item['precio_unitario'],
-                item['subtotal']
+                item['subtotal'],
+                bool(item.get('precio_fijo'))
             ))
             # 3. Descontar stock
             cursor.execute('''
                 UPDATE productos SET cantidad = cantidad - ? WHERE id = ?
             ''', (item['cantidad'], item['producto_id']))
+        # 4. Acumulado diario por producto
+        self._sumar_ventas_diarias(cursor, fecha[:10], items)
+        self._sumar_frecuencias(cursor, [item['producto_id'] for item in items])
         self.conn.commit()
+        self._notificar(CAMBIO_PRODUCTOS, {item['producto_id'] for item in items})
+        self._notificar(CAMBIO_VENTAS, {venta_id})
         return venta_id
 
     def obtener_ventas(self, fecha_desde=None, fecha_hasta=None):
@@ -239,7 +681,8 @@ class Database:
                 nombre_producto,
                 cantidad,
                 precio_unitario,
-                subtotal
+                subtotal,
+                precio_fijo
             FROM detalles_venta
             WHERE venta_id = ?
         ''', (venta_id,))
@@ -271,26 +714,408 @@ class Database:
     def agregar_producto(self, data):
         cur = self.conn.cursor()
         cur.execute(
-            "INSERT INTO productos (nombre, codigo, precio_compra, precio_venta, cantidad) VALUES (?, ?, ?, ?, ?)",
-            (data['nombre'], data['codigo'], data['precio_compra'], data['precio_venta'], data['cantidad'])
+            "INSERT INTO productos (nombre, codigo, precio_compra, precio_venta, cantidad, stock_minimo, plu) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (data['nombre'], data['codigo'], data['precio_compra'], data['precio_venta'], data['cantidad'],
+             data.get('stock_minimo', 0), data.get('plu'))
         )
         self.conn.commit()
+        self._notificar(CAMBIO_PRODUCTOS, {cur.lastrowid})
 
     def actualizar_producto(self, prod_id, data):
         cur = self.conn.cursor()
         cur.execute(
-            "UPDATE productos SET nombre=?, codigo=?, precio_compra=?, precio_venta=?, cantidad=? WHERE id=?",
-            (data['nombre'], data['codigo'], data['precio_compra'], data['precio_venta'], data['cantidad'], prod_id)
+            "UPDATE productos SET nombre=?, codigo=?, precio_compra=?, precio_venta=?, cantidad=?, stock_minimo=?, plu=? WHERE id=?",
+            (data['nombre'], data['codigo'], data['precio_compra'], data['precio_venta'], data['cantidad'],
+             data.get('stock_minimo', 0), data.get('plu'), prod_id)
         )
         self.conn.commit()
+        self._notificar(CAMBIO_PRODUCTOS, {prod_id})
 
     def eliminar_producto(self, prod_id):
         cur = self.conn.cursor()
         cur.execute("DELETE FROM productos WHERE id=?", (prod_id,))
         self.conn.commit()
+        self._notificar(CAMBIO_PRODUCTOS, {prod_id})
+
+    # ---- Importación masiva ----
+
+    def importar_productos(self, file_path, progreso=None, tamano_lote=1000):
+        """Importa productos desde un CSV o XLSX; si el código ya existe, actualiza el producto.
+
+        La columna cantidad es opcional: si falta o la celda está vacía, el stock actual no se modifica.
+
+        Devuelve {'insertados', 'actualizados', 'errores', 'avisos'}, donde errores es una lista de
+        (numero_fila, mensaje) y avisos son problemas del archivo completo (p. ej. sin columna codigo).
+        Si faltan columnas obligatorias lanza ValueError sin importar nada. Si se entrega progreso, se llama con las filas leídas tras cada lote.
+        """
+        resumen = {'insertados': 0, 'actualizados': 0, 'errores': [], 'avisos': []}
+        cur = self.conn.cursor()
+        lote = []
+        leidas = 0
+        try:
+            for num_fila, fila in _leer_filas_archivo(file_path, resumen['avisos']):
+                leidas += 1
+                try:
+                    lote.append(_validar_fila_producto(fila))
+                except ValueError as e:
+                    resumen['errores'].append((num_fila, str(e)))
+                if len(lote) >= tamano_lote:
+                    self._guardar_lote_productos(cur, lote, resumen)
+                    lote = []
+                    if progreso:
+                        progreso(leidas)
+            if lote:
+                self._guardar_lote_productos(cur, lote, resumen)
+            if progreso:
+                progreso(leidas)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        self._notificar(CAMBIO_PRODUCTOS, None)
+        return resumen
+
+    def _guardar_lote_productos(self, cur, lote, resumen):
+        # Dentro de un lote gana la última fila de cada código
+        con_codigo = {}
+        sin_codigo = []
+        for prod in lote:
+            if prod['codigo']:
+                con_codigo[prod['codigo']] = prod
+            else:
+                sin_codigo.append(prod)
+
+        # El lote pasa por una tabla temporal y se aplica con sentencias de conjunto: así los triggers
+        # del índice de texto corren dentro de una sola sentencia en vez de una por fila
+        cur.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS lote_productos (
+                nombre TEXT, codigo TEXT, precio_compra INTEGER, precio_venta INTEGER, cantidad REAL
+            )
+        ''')
+        cur.execute("DELETE FROM lote_productos")
+        cur.executemany(
+            "INSERT INTO lote_productos (nombre, codigo, precio_compra, precio_venta, cantidad) VALUES (?, ?, ?, ?, ?)",
+            [(p['nombre'], p['codigo'], p['precio_compra'], p['precio_venta'], p['cantidad'])
+             for p in list(con_codigo.values()) + sin_codigo]
+        )
+        cur.execute('''
+            UPDATE productos
+            SET nombre = l.nombre, precio_compra = l.precio_compra, precio_venta = l.precio_venta,
+                cantidad = COALESCE(l.cantidad, productos.cantidad)
+            FROM lote_productos l
+            WHERE productos.codigo = l.codigo
+        ''')
+        resumen['actualizados'] += max(cur.rowcount, 0)
+
+        cur.execute('''
+            INSERT INTO productos (nombre, precio_compra, precio_venta, cantidad, codigo)
+            SELECT l.nombre, l.precio_compra, l.precio_venta, COALESCE(l.cantidad, 0), l.codigo
+            FROM lote_productos l
+            WHERE l.codigo IS NULL OR NOT EXISTS (SELECT 1 FROM productos p WHERE p.codigo = l.codigo)
+            ORDER BY l.rowid
+        ''')
+        resumen['insertados'] += max(cur.rowcount, 0)
+
+    # ---- Conteo físico de inventario ----
+
+    def iniciar_conteo(self):
+        """Prepara la tabla temporal donde se acumulan las cantidades contadas."""
+        cur = self.conn.cursor()
+        cur.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS conteo_inventario (
+                producto_id INTEGER PRIMARY KEY,
+                contado REAL NOT NULL,
+                aceptado INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cur.execute("DELETE FROM conteo_inventario")
+        self.conn.commit()
+
+    def guardar_conteos(self, conteos):
+        """conteos: dict {producto_id: cantidad_contada}. Reemplaza lo contado antes para esos productos."""
+        cur = self.conn.cursor()
+        cur.executemany('''
+            INSERT INTO conteo_inventario (producto_id, contado) VALUES (?, ?)
+            ON CONFLICT(producto_id) DO UPDATE SET contado = excluded.contado
+        ''', list(conteos.items()))
+        self.conn.commit()
+
+    def obtener_diferencias_conteo(self):
+        cur = self.conn.cursor()
+        cur.execute('''
+            SELECT p.id AS producto_id, p.nombre, p.codigo,
+                   p.cantidad AS cantidad_sistema, c.contado,
+                   c.contado - p.cantidad AS diferencia
+            FROM conteo_inventario c
+            JOIN productos p ON p.id = c.producto_id
+            WHERE round(c.contado, 3) != round(p.cantidad, 3)
+            ORDER BY abs(c.contado - p.cantidad) DESC
+        ''')
+        return [dict(row) for row in cur.fetchall()]
+
+    def aplicar_conteo(self, producto_ids, motivo="Conteo físico"):
+        """Deja el stock de los productos aceptados igual a lo contado y registra el ajuste."""
+        cur = self.conn.cursor()
+        fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            cur.execute("UPDATE conteo_inventario SET aceptado = 0")
+            cur.executemany(
+                "UPDATE conteo_inventario SET aceptado = 1 WHERE producto_id = ?",
+                [(pid,) for pid in producto_ids]
+            )
+            cur.execute('''
+                INSERT INTO ajustes_inventario
+                (fecha, producto_id, nombre_producto, cantidad_anterior, cantidad_nueva, motivo)
+                SELECT ?, p.id, p.nombre, p.cantidad, c.contado, ?
+                FROM conteo_inventario c
+                JOIN productos p ON p.id = c.producto_id
+                WHERE c.aceptado = 1
+            ''', (fecha, motivo))
+            ajustados = cur.rowcount
+            cur.execute('''
+                UPDATE productos SET cantidad = c.contado
+                FROM conteo_inventario c
+                WHERE c.producto_id = productos.id AND c.aceptado = 1
+            ''')
+            cur.execute("DELETE FROM conteo_inventario WHERE aceptado = 1")
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        self._notificar(CAMBIO_PRODUCTOS, set(producto_ids))
+        return ajustados
+
+    def terminar_conteo(self):
+        self.conn.execute("DROP TABLE IF EXISTS temp.conteo_inventario")
+        self.conn.commit()
+
+    # ---- Reposición ----
+
+    def obtener_reposicion(self, hoy=None):
+        """Productos bajo su stock mínimo con unidades vendidas en 7/30/90 días y días de cobertura.
+
+        Lee solo el índice parcial de productos bajo mínimo y el acumulado diario, nunca detalles_venta.
+        """
+        hoy = hoy or datetime.now().date()
+        desde = {n: (hoy - timedelta(days=n - 1)).isoformat() for n in (7, 30, 90)}
+        cur = self.conn.cursor()
+        cur.execute('''
+            SELECT p.id, p.nombre, p.codigo, p.cantidad, p.stock_minimo,
+                   (SELECT COALESCE(SUM(unidades), 0) FROM ventas_diarias_producto
+                    WHERE producto_id = p.id AND dia >= :d7) AS unidades_7,
+                   (SELECT COALESCE(SUM(unidades), 0) FROM ventas_diarias_producto
+                    WHERE producto_id = p.id AND dia >= :d30) AS unidades_30,
+                   (SELECT COALESCE(SUM(unidades), 0) FROM ventas_diarias_producto
+                    WHERE producto_id = p.id AND dia >= :d90) AS unidades_90
+            FROM productos p
+            WHERE p.cantidad <= p.stock_minimo
+            ORDER BY p.nombre
+        ''', {'d7': desde[7], 'd30': desde[30], 'd90': desde[90]})
+        reporte = []
+        for row in cur.fetchall():
+            fila = dict(row)
+            diario = fila['unidades_30'] / 30
+            fila['dias_cobertura'] = max(fila['cantidad'], 0) / diario if diario > 0 else None
+            # Sugerido: cubrir 30 días de venta más el stock mínimo
+            fila['sugerido'] = max(fila['unidades_30'] + fila['stock_minimo'] - fila['cantidad'], 0)
+            reporte.append(fila)
+        return reporte
+
+    # ---- Reportes ----
+
+    def resumen_ventas(self, desde, hasta, top=10):
+        """Totales por día y productos más vendidos entre dos fechas 'YYYY-MM-DD' (ambas incluidas)."""
+        cur = self.conn.cursor()
+        cur.execute('''
+            SELECT date(fecha) AS dia, COUNT(*) AS ventas, SUM(total) AS total
+            FROM ventas
+            WHERE fecha BETWEEN ? AND ?
+            GROUP BY dia
+            ORDER BY dia
+        ''', (f"{desde} 00:00:00", f"{hasta} 23:59:59"))
+        por_dia = [dict(row) for row in cur.fetchall()]
+        cur.execute('''
+            SELECT v.producto_id, COALESCE(p.nombre, 'Producto eliminado') AS nombre,
+                   SUM(v.unidades) AS unidades, SUM(v.monto) AS monto
+            FROM ventas_diarias_producto v
+            LEFT JOIN productos p ON p.id = v.producto_id
+            WHERE v.dia BETWEEN ? AND ?
+            GROUP BY v.producto_id
+            HAVING abs(SUM(v.unidades)) >= 1e-9 OR SUM(v.monto) <> 0
+            ORDER BY monto DESC
+            LIMIT ?
+        ''', (desde, hasta, top))
+        productos = [dict(row) for row in cur.fetchall()]
+        return {
+            'desde': desde,
+            'hasta': hasta,
+            'ventas': sum(d['ventas'] for d in por_dia),
+            'total': sum(d['total'] for d in por_dia),
+            'por_dia': por_dia,
+            'top_productos': productos,
+        }
+
+    # ---- Historial por producto ----
+
+    def obtener_historial_producto(self, producto_id, antes_de=None, limite=50):
+        """Tickets que incluyen el producto, del más reciente al más antiguo.
+
+        Para la página siguiente se pasa antes_de = (venta_id, detalle_id) de la última fila recibida;
+        detalle_id desempata cuando el producto aparece en varias líneas del mismo ticket.
+        """
+        cur = self.conn.cursor()
+        query = '''
+            SELECT d.venta_id, d.id AS detalle_id, v.fecha, d.cantidad, d.precio_unitario, d.subtotal
+            FROM detalles_venta d
+            JOIN ventas v ON v.id = d.venta_id
+            WHERE d.producto_id = ?
+        '''
+        params = [producto_id]
+        if antes_de is not None:
+            query += ' AND (d.venta_id, d.id) < (?, ?)'
+            params.extend(antes_de)
+        query += ' ORDER BY d.venta_id DESC, d.id DESC LIMIT ?'
+        params.append(limite)
+        cur.execute(query, params)
+        return [dict(row) for row in cur.fetchall()]
+
+    def resumen_producto_por_periodo(self, producto_id, periodo="Mes", limite=12):
+        """Unidades y monto vendidos del producto por Día, Mes o Año (últimos periodos primero)."""
+        largo = {"Día": 10, "Mes": 7, "Año": 4}[periodo]
+        cur = self.conn.cursor()
+        cur.execute('''
+            SELECT substr(dia, 1, ?) AS periodo, SUM(unidades) AS unidades, SUM(monto) AS monto
+            FROM ventas_diarias_producto
+            WHERE producto_id = ?
+            GROUP BY periodo
+            ORDER BY periodo DESC
+            LIMIT ?
+        ''', (largo, producto_id, limite))
+        return [dict(row) for row in cur.fetchall()]
+
+    # ---- Mantenimiento ----
+
+    def estado_almacenamiento(self):
+        cur = self.conn.cursor()
+        return {
+            pragma: cur.execute(f"PRAGMA {pragma}").fetchone()[0]
+            for pragma in ("page_size", "page_count", "freelist_count", "auto_vacuum", "journal_mode")
+        }
+
+    def vaciar_paginas_libres(self, paginas=200):
+        """Devuelve al disco hasta `paginas` páginas libres. Retorna los bytes liberados."""
+        estado = self.estado_almacenamiento()
+        self.conn.execute(f"PRAGMA incremental_vacuum({int(paginas)})").fetchall()
+        self.conn.commit()
+        libres = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (estado['freelist_count'] - libres) * estado['page_size']
+
+    def compactar(self):
+        """VACUUM completo que además activa auto_vacuum incremental. Bloquea la base mientras dura."""
+        antes = self.estado_almacenamiento()
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.conn.execute("VACUUM")
+        despues = self.estado_almacenamiento()
+        return antes['page_count'] * antes['page_size'] - despues['page_count'] * despues['page_size']
+
+    def optimizar(self):
+        """Actualiza las estadísticas del planificador de consultas (con límite de filas por índice)."""
+        self.conn.execute("PRAGMA analysis_limit = 400")
+        hay_estadisticas = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone()
+        self.conn.execute("PRAGMA optimize" if hay_estadisticas else "ANALYZE")
+        self.conn.commit()
+
+    def checkpoint(self):
+        """Pasa el WAL al archivo principal sin esperar a lectores. None si la base no usa WAL."""
+        if self.estado_almacenamiento()['journal_mode'] != 'wal':
+            return None
+        ocupado, paginas_wal, copiadas = self.conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        return {'ocupado': bool(ocupado), 'paginas_wal': paginas_wal, 'copiadas': copiadas}
+
+    def verificacion_rapida(self):
+        """Resultado de PRAGMA quick_check: ['ok'] si la base está sana."""
+        return [row[0] for row in self.conn.execute("PRAGMA quick_check(20)").fetchall()]
+
+    # ---- Teclas rápidas ----
+
+    def obtener_teclas_rapidas(self, limite=12):
+        """Productos sin código de barras para las teclas rápidas: primero los fijados, luego los más vendidos."""
+        cur = self.conn.cursor()
+        cur.execute('''
+            SELECT p.*, f.veces, f.fijo
+            FROM frecuencia_productos f
+            JOIN productos p ON p.id = f.producto_id
+            WHERE f.fijo IS NOT NULL
+            ORDER BY f.fijo
+        ''')
+        teclas = [dict(row) for row in cur.fetchall()][:limite]
+        if len(teclas) < limite:
+            cur.execute('''
+                SELECT p.*, f.veces, f.fijo
+                FROM frecuencia_productos f
+                JOIN productos p ON p.id = f.producto_id
+                WHERE f.fijo IS NULL AND f.veces > 0 AND (p.codigo IS NULL OR p.codigo = '')
+                ORDER BY f.veces DESC
+                LIMIT ?
+            ''', (limite - len(teclas),))
+            teclas += [dict(row) for row in cur.fetchall()]
+        return teclas
+
+    def fijar_tecla_rapida(self, producto_id, fijar=True):
+        cur = self.conn.cursor()
+        if fijar:
+            cur.execute('''
+                INSERT INTO frecuencia_productos (producto_id, fijo)
+                VALUES (?, (SELECT COALESCE(MAX(fijo), 0) + 1 FROM frecuencia_productos))
+                ON CONFLICT(producto_id) DO UPDATE SET fijo = excluded.fijo
+            ''', (producto_id,))
+        else:
+            cur.execute("UPDATE frecuencia_productos SET fijo = NULL WHERE producto_id = ?", (producto_id,))
+        self.conn.commit()
+
+    # ---- Tickets aparcados ----
+
+    def aparcar_ticket(self, items, etiqueta):
+        cur = self.conn.cursor()
+        fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cur.execute(
+            "INSERT INTO tickets_aparcados (fecha, etiqueta, items) VALUES (?, ?, ?)",
+            (fecha, etiqueta, json.dumps(items, ensure_ascii=False))
+        )
+        self.conn.commit()
+        return {'id': cur.lastrowid, 'fecha': fecha, 'etiqueta': etiqueta, 'items': items}
+
+    def obtener_tickets_aparcados(self):
+        cur = self.conn.cursor()
+        cur.execute("SELECT * FROM tickets_aparcados ORDER BY id")
+        return [dict(row, items=json.loads(row['items'])) for row in cur.fetchall()]
+
+    def eliminar_ticket_aparcado(self, ticket_id):
+        cur = self.conn.cursor()
+        cur.execute("DELETE FROM tickets_aparcados WHERE id=?", (ticket_id,))
+        self.conn.commit()
+
+    # ---- Respaldo ----
+
+    def respaldar(self, destino):
+        """Copia consistente de la base en destino, aunque la aplicación esté abierta."""
+        copia = sqlite3.connect(destino)
+        try:
+            with copia:
+                self.conn.backup(copia)
+        finally:
+            copia.close()
 
     # ---- CRUD Ventas (solo estructura, puedes completar luego) ----
 
+    def obtener_venta(self, venta_id):
+        cur = self.conn.cursor()
+        cur.execute("SELECT * FROM ventas WHERE id=?", (venta_id,))
+        row = cur.fetchone()
+        return dict(row) if row else None
+
     def obtener_ventas_filtradas(self, fecha_desde, fecha_hasta):
         cur = self.conn.cursor()
         q = "SELECT * FROM ventas WHERE datetime(fecha) BETWEEN ? AND ?"
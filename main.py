@@ -1,11 +1,32 @@
 # main.py
+import time
+_INICIO = time.perf_counter()  # Antes de importar Qt, para medir el arranque completo
+
 import sys
+import os
+import logging
+from logging.handlers import RotatingFileHandler
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QFont
 from ui_main_window import MainWindow  # Asegúrate de crear este archivo después
 
 if __name__ == "__main__":
+    from database import get_data_dir
+
+    # Registro de la aplicación (mantenimiento, etc.) junto a la base de datos
+    handler = RotatingFileHandler(os.path.join(get_data_dir(), "barrilito.log"),
+                                  maxBytes=1_000_000, backupCount=3, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s"))
+    logging.getLogger("barrilito").addHandler(handler)
+    logging.getLogger("barrilito").setLevel(logging.INFO)
+
     app = QApplication(sys.argv)
+
+    # Registra en vigilante.log los congelamientos de la interfaz (umbral en segundos configurable)
+    from ui_vigilante import VigilanteBucle
+    vigilante = VigilanteBucle(os.path.join(get_data_dir(), "vigilante.log"),
+                               umbral=float(os.environ.get("BARRILITO_UMBRAL_BLOQUEO", "1.0")))
+    app.aboutToQuit.connect(vigilante.detener)
     
     # Fuente grande y accesible para toda la app
     app.setFont(QFont("Arial", 16))
@@ -28,5 +49,19 @@ if __name__ == "__main__":
     window.setWindowTitle("POS Minimarket - Punto de Venta")
     window.resize(1080, 720)  # Resolución cómoda
     window.show()
-    
+
+    if "--medir-arranque" in sys.argv:
+        # Anota el tiempo hasta la primera vuelta del bucle de eventos y cierra la app.
+        # En el ejecutable sin consola el resultado queda en arranque.log, junto a la base.
+        from PySide6.QtCore import QTimer
+
+        def registrar_arranque():
+            ms = (time.perf_counter() - _INICIO) * 1000
+            congelado = "ejecutable" if getattr(sys, 'frozen', False) else "python"
+            with open(os.path.join(get_data_dir(), "arranque.log"), "a", encoding="utf-8") as f:
+                f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {congelado} {ms:.0f} ms\n")
+            app.quit()
+
+        QTimer.singleShot(0, registrar_arranque)
+
     sys.exit(app.exec())
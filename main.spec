@@ -1,5 +1,22 @@
 # -*- mode: python ; coding: utf-8 -*-
+# Perfil de arranque rápido: modo carpeta (one-dir), sin UPX y sin módulos que la app no usa.
+# minimarket.db se incluye solo como plantilla; la base en uso vive en la carpeta del usuario
+# (ver database.get_data_dir) y se copia desde aquí únicamente en el primer arranque.
 
+excluidos = [
+    # Dependencias de requirements.txt que la app no importa
+    'gspread', 'oauth2client',
+    # Librerías pesadas que pandas/openpyxl arrastran de forma opcional
+    'tkinter', 'matplotlib', 'scipy', 'IPython', 'PIL', 'pytest',
+    # Módulos de Qt que no se usan (solo QtCore, QtGui y QtWidgets)
+    'PySide6.QtNetwork', 'PySide6.QtQml', 'PySide6.QtQuick', 'PySide6.QtQuickWidgets',
+    'PySide6.QtWebEngineCore', 'PySide6.QtWebEngineWidgets', 'PySide6.QtWebChannel',
+    'PySide6.QtMultimedia', 'PySide6.QtMultimediaWidgets', 'PySide6.Qt3DCore', 'PySide6.Qt3DRender',
+    'PySide6.QtCharts', 'PySide6.QtDataVisualization', 'PySide6.QtPdf', 'PySide6.QtPdfWidgets',
+    'PySide6.QtSql', 'PySide6.QtOpenGL', 'PySide6.QtOpenGLWidgets', 'PySide6.QtBluetooth',
+    'PySide6.QtPositioning', 'PySide6.QtLocation', 'PySide6.QtSensors', 'PySide6.QtSerialPort',
+    'PySide6.QtDesigner', 'PySide6.QtHelp', 'PySide6.QtTest', 'PySide6.QtXml',
+]
 
 a = Analysis(
     ['main.py'],
@@ -10,25 +27,22 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=excluidos,
     noarchive=False,
-    optimize=0,
+    optimize=1,
 )
 pyz = PYZ(a.pure)
 
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='main',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -36,3 +50,13 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='main',
+)
@@ -0,0 +1,97 @@
+# mantenimiento.py
+"""Tareas de mantenimiento de la base, divididas en pasos cortos para correr en momentos sin ventas.
+
+No depende de Qt: la aplicación lo usa desde ui_mantenimiento.ProgramadorMantenimiento y la línea de
+comandos desde 'python -m barrilito mantenimiento'.
+"""
+import logging
+import time
+from datetime import datetime
+
+from database import Database
+
+logger = logging.getLogger("barrilito.mantenimiento")
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class Mantenimiento:
+    # Orden de ejecución; "compactar" solo corre si la base aún no tiene auto_vacuum incremental
+    TAREAS = ("verificar", "optimizar", "compactar", "vaciar", "checkpoint")
+
+    def __init__(self, db: Database, paginas_por_paso=200, permitir_compactar=True):
+        # Sin permitir_compactar el VACUUM completo (no cabe en un paso corto) solo se informa como pendiente
+        self.db = db
+        self.paginas_por_paso = paginas_por_paso
+        self.permitir_compactar = permitir_compactar
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.pendientes = list(self.TAREAS)
+        self.informe = {
+            'inicio': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'fin': None,
+            'tareas': [],
+            'integridad': None,
+            'compactar_pendiente': False,
+            'bytes_liberados': 0,
+            'segundos': 0.0,
+        }
+
+    @property
+    def terminado(self):
+        return not self.pendientes
+
+    def paso(self, presupuesto=0.2):
+        """Ejecuta tareas hasta gastar unos `presupuesto` segundos. Devuelve True cuando ya no queda nada.
+
+        Cada tarea individual es corta salvo "compactar" (un VACUUM completo, una sola vez por base).
+        """
+        inicio = time.perf_counter()
+        while self.pendientes and time.perf_counter() - inicio < presupuesto:
+            tarea = self.pendientes[0]
+            if tarea == "vaciar":
+                liberados = self.db.vaciar_paginas_libres(self.paginas_por_paso)
+                self.informe['bytes_liberados'] += liberados
+                if liberados > 0:
+                    continue  # Quedan páginas libres: sigue en el próximo ciclo o paso
+                self._completar(tarea)
+            elif tarea == "verificar":
+                self.informe['integridad'] = self.db.verificacion_rapida()
+                self._completar(tarea)
+            elif tarea == "optimizar":
+                self.db.optimizar()
+                self._completar(tarea)
+            elif tarea == "compactar":
+                if self.db.estado_almacenamiento()['auto_vacuum'] == AUTO_VACUUM_INCREMENTAL:
+                    self.pendientes.pop(0)
+                elif self.permitir_compactar:
+                    self.informe['bytes_liberados'] += self.db.compactar()
+                    self._completar(tarea)
+                else:
+                    self.informe['compactar_pendiente'] = True
+                    logger.warning("La base aún no tiene auto_vacuum incremental; "
+                                   "ejecutar 'python -m barrilito mantenimiento' con la caja cerrada")
+                    self.pendientes.pop(0)
+            elif tarea == "checkpoint":
+                resultado = self.db.checkpoint()
+                if resultado is not None:
+                    self._completar(tarea)
+                else:
+                    self.pendientes.pop(0)
+        self.informe['segundos'] += time.perf_counter() - inicio
+
+        if not self.pendientes and self.informe['fin'] is None:
+            self.informe['fin'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            logger.info(
+                "Mantenimiento terminado: %s; integridad %s; %d bytes liberados en %.2f s",
+                ", ".join(self.informe['tareas']) or "sin tareas",
+                ", ".join(self.informe['integridad'] or []),
+                self.informe['bytes_liberados'],
+                self.informe['segundos'],
+            )
+        return self.terminado
+
+    def _completar(self, tarea):
+        self.pendientes.pop(0)
+        self.informe['tareas'].append(tarea)
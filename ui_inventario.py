@@ -1,16 +1,22 @@
 # ui_inventario.py
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
-    QTableWidget, QTableWidgetItem, QMessageBox, QDialog, QFormLayout, QSpinBox, QDoubleSpinBox
+    QTableWidget, QTableWidgetItem, QMessageBox, QDialog, QFormLayout, QSpinBox, QDoubleSpinBox,
+    QFileDialog, QProgressDialog, QApplication, QComboBox
 )
 from PySide6.QtCore import Qt
-from database import Database
+from database import Database, CAMBIO_PRODUCTOS
+from balanza import normalizar_plu
+from ui_vender import SelectorProductoDialog
 
 class InventarioWidget(QWidget):
     def __init__(self, db: Database, parent=None):
         super().__init__(parent)
         self.db = db
+        self._cambios = set()       # ids de productos modificados aún no reflejados en la tabla
+        self._recargar = False      # True si hay que recargar todo
         self.init_ui()
+        self.db.suscribir(self._on_cambio)
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -28,6 +34,21 @@ class InventarioWidget(QWidget):
         btn_add.setStyleSheet("font-size: 18px; background-color: #5fb85f; color: white;")
         btn_add.clicked.connect(self.abrir_agregar)
         busq_layout.addWidget(btn_add)
+
+        btn_importar = QPushButton("Importar")
+        btn_importar.setStyleSheet("font-size: 18px; background-color: #8e6fd1; color: white;")
+        btn_importar.clicked.connect(self.importar_archivo)
+        busq_layout.addWidget(btn_importar)
+
+        btn_conteo = QPushButton("Conteo")
+        btn_conteo.setStyleSheet("font-size: 18px; background-color: #f0a030; color: white;")
+        btn_conteo.clicked.connect(self.abrir_conteo)
+        busq_layout.addWidget(btn_conteo)
+
+        btn_reponer = QPushButton("Reponer")
+        btn_reponer.setStyleSheet("font-size: 18px; background-color: #00897b; color: white;")
+        btn_reponer.clicked.connect(self.abrir_reposicion)
+        busq_layout.addWidget(btn_reponer)
         layout.addLayout(busq_layout)
 
         # Tabla de productos
@@ -50,43 +71,105 @@ class InventarioWidget(QWidget):
 
     def showEvent(self, event):
         super().showEvent(event)
-        self.cargar_productos()  # Recargar productos cada vez que se muestra
+        self.aplicar_cambios()  # Solo toca las filas que cambiaron desde la última vez
+
+    def _on_cambio(self, tipo, ids):
+        if tipo != CAMBIO_PRODUCTOS:
+            return
+        if ids is None:
+            self._recargar = True
+        else:
+            self._cambios.update(ids)
+        if self.isVisible():
+            self.aplicar_cambios()
+
+    def aplicar_cambios(self):
+        # Cambios hechos por otro proceso: no sabemos qué filas, se recarga todo
+        if self._recargar or self.db.version_datos() != self._version:
+            self.cargar_productos()
+            return
+        cambios, self._cambios = self._cambios, set()
+        for prod_id in cambios:
+            self.actualizar_fila_producto(prod_id)
 
     def cargar_productos(self):
-        productos = self.db.obtener_productos()
+        productos = [dict(p) for p in self.db.obtener_productos()]
         self._p_rows = productos
-        self.mostrar_tabla(productos)
+        self._por_id = {p['id']: p for p in productos}
+        self._cambios = set()
+        self._recargar = False
+        self._version = self.db.version_datos()
+        self.filtrar_tabla(self.search_edit.text())
 
     def mostrar_tabla(self, productos):
+        self._visibles = [prod['id'] for prod in productos]  # ids en el orden de las filas
         self.tabla.setRowCount(len(productos))
         for i, prod in enumerate(productos):
-            self.tabla.setItem(i, 0, QTableWidgetItem(prod['nombre']))
-            self.tabla.setItem(i, 1, QTableWidgetItem(str(prod['codigo'] or "")))
-            self.tabla.setItem(i, 2, QTableWidgetItem(f"${prod['precio_compra']:,}"))
-            self.tabla.setItem(i, 3, QTableWidgetItem(f"${prod['precio_venta']:,}"))
-            self.tabla.setItem(i, 4, QTableWidgetItem(str(prod['cantidad'])))
-            self.tabla.setRowHeight(i, 80)
-
-            # Botón editar
-            btn_edit = QPushButton("Editar")
-            btn_edit.setStyleSheet("font-size: 15px; background-color: #1e88e5; color: black;")
-            btn_edit.clicked.connect(lambda checked, prod_id=prod['id']: self.abrir_editar(prod_id))
-            # Botón eliminar
-            btn_del = QPushButton("Eliminar")
-            btn_del.setStyleSheet("font-size: 15px; background-color: #e53935; color: black;")
-            btn_del.clicked.connect(lambda checked, prod_id=prod['id']: self.confirmar_eliminar(prod_id))
-
-            acc_layout = QHBoxLayout()
-            acc_layout.addWidget(btn_edit)
-            acc_layout.addWidget(btn_del)
-            acc_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            w = QWidget()
-            w.setLayout(acc_layout)
-            self.tabla.setCellWidget(i, 5, w)
+            self._pintar_fila(i, prod)
+
+    def _pintar_fila(self, i, prod):
+        self.tabla.setItem(i, 0, QTableWidgetItem(prod['nombre']))
+        self.tabla.setItem(i, 1, QTableWidgetItem(str(prod['codigo'] or "")))
+        self.tabla.setItem(i, 2, QTableWidgetItem(f"${prod['precio_compra']:,}"))
+        self.tabla.setItem(i, 3, QTableWidgetItem(f"${prod['precio_venta']:,}"))
+        self.tabla.setItem(i, 4, QTableWidgetItem(str(prod['cantidad'])))
+        self.tabla.setRowHeight(i, 80)
+
+        # Botón editar
+        btn_edit = QPushButton("Editar")
+        btn_edit.setStyleSheet("font-size: 15px; background-color: #1e88e5; color: black;")
+        btn_edit.clicked.connect(lambda checked, prod_id=prod['id']: self.abrir_editar(prod_id))
+        # Botón eliminar
+        btn_del = QPushButton("Eliminar")
+        btn_del.setStyleSheet("font-size: 15px; background-color: #e53935; color: black;")
+        btn_del.clicked.connect(lambda checked, prod_id=prod['id']: self.confirmar_eliminar(prod_id))
+        # Botón historial de ventas
+        btn_hist = QPushButton("Historial")
+        btn_hist.setStyleSheet("font-size: 15px; background-color: #9e9e9e; color: black;")
+        btn_hist.clicked.connect(lambda checked, prod_id=prod['id']: self.abrir_historial(prod_id))
+
+        acc_layout = QHBoxLayout()
+        acc_layout.addWidget(btn_edit)
+        acc_layout.addWidget(btn_del)
+        acc_layout.addWidget(btn_hist)
+        acc_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        w = QWidget()
+        w.setLayout(acc_layout)
+        self.tabla.setCellWidget(i, 5, w)
+
+    def actualizar_fila_producto(self, prod_id):
+        """Refleja en memoria y en la tabla el estado actual de un producto (nuevo, editado o eliminado)."""
+        anterior = self._por_id.pop(prod_id, None)
+        if anterior is not None:
+            self._p_rows.remove(anterior)
+        if prod_id in self._visibles:
+            fila = self._visibles.index(prod_id)
+            self.tabla.removeRow(fila)
+            del self._visibles[fila]
+
+        prod = self.db.obtener_producto_por_id(prod_id)
+        if not prod:
+            return
+        pos = next((i for i, p in enumerate(self._p_rows) if p['nombre'] > prod['nombre']), len(self._p_rows))
+        self._p_rows.insert(pos, prod)
+        self._por_id[prod_id] = prod
+
+        if self._coincide(prod, self.search_edit.text().lower()):
+            fila = next(
+                (i for i, pid in enumerate(self._visibles) if self._por_id[pid]['nombre'] > prod['nombre']),
+                len(self._visibles)
+            )
+            self.tabla.insertRow(fila)
+            self._visibles.insert(fila, prod_id)
+            self._pintar_fila(fila, prod)
+
+    @staticmethod
+    def _coincide(prod, texto):
+        return texto in prod['nombre'].lower() or texto in str(prod['codigo']).lower()
 
     def filtrar_tabla(self, texto):
         texto = texto.lower()
-        filtrados = [p for p in self._p_rows if texto in p['nombre'].lower() or texto in str(p['codigo']).lower()]
+        filtrados = [p for p in self._p_rows if self._coincide(p, texto)]
         self.mostrar_tabla(filtrados)
 
     def abrir_agregar(self):
@@ -97,7 +180,6 @@ class InventarioWidget(QWidget):
                 QMessageBox.warning(self, "Error", "Todos los campos obligatorios.")
                 return
             self.db.agregar_producto(data)
-            self.cargar_productos()
 
     def abrir_editar(self, prod_id):
         prod = self.db.obtener_producto_por_id(prod_id)
@@ -108,14 +190,376 @@ class InventarioWidget(QWidget):
         if dlg.exec():
             data = dlg.get_data()
             self.db.actualizar_producto(prod_id, data)
-            self.cargar_productos()
+
+    def importar_archivo(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Importar productos", "", "Planillas (*.csv *.xlsx)"
+        )
+        if not file_path:
+            return
+
+        progreso = QProgressDialog("Importando productos...", None, 0, 0, self)
+        progreso.setWindowTitle("Importar")
+        progreso.setModal(True)
+        progreso.setMinimumDuration(0)
+        progreso.show()
+
+        def avance(filas):
+            progreso.setLabelText(f"Importando productos... {filas:,} filas leídas")
+            QApplication.processEvents()
+
+        try:
+            resumen = self.db.importar_productos(file_path, progreso=avance)
+        except Exception as e:
+            progreso.close()
+            QMessageBox.critical(self, "Error", f"No se pudo importar el archivo:\n{e}")
+            return
+        progreso.close()
+
+        texto = (f"Productos nuevos: {resumen['insertados']:,}\n"
+                 f"Productos actualizados: {resumen['actualizados']:,}\n"
+                 f"Filas con error: {len(resumen['errores']):,}")
+        if resumen['avisos']:
+            texto += "\n\n" + "\n".join(resumen['avisos'])
+        if resumen['errores']:
+            texto += "\n\n" + "\n".join(f"Fila {fila}: {msg}" for fila, msg in resumen['errores'][:20])
+            if len(resumen['errores']) > 20:
+                texto += "\n..."
+        QMessageBox.information(self, "Importación terminada", texto)
+
+    def abrir_conteo(self):
+        dlg = ConteoDialog(self.db, parent=self)
+        dlg.exec()
+
+    def abrir_historial(self, prod_id):
+        prod = self._por_id.get(prod_id) or self.db.obtener_producto_por_id(prod_id)
+        if not prod:
+            QMessageBox.warning(self, "Error", "Producto no encontrado.")
+            return
+        dlg = HistorialProductoDialog(self.db, prod, parent=self)
+        dlg.exec()
+
+    def abrir_reposicion(self):
+        dlg = ReposicionDialog(self.db.obtener_reposicion(), parent=self)
+        dlg.exec()
 
     def confirmar_eliminar(self, prod_id):
         res = QMessageBox.question(self, "Eliminar producto", "¿Seguro que deseas eliminar este producto?",
         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if res == QMessageBox.Yes:
             self.db.eliminar_producto(prod_id)
-            self.cargar_productos()
+
+class ConteoDialog(QDialog):
+    """Conteo físico: se escanean los productos y al final se comparan con el stock del sistema."""
+
+    GUARDAR_CADA = 50  # Escaneos acumulados en memoria antes de pasarlos a la tabla temporal
+
+    def __init__(self, db: Database, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.conteos = {}       # producto_id -> cantidad contada
+        self.pendientes = {}    # Conteos aún no guardados en la tabla temporal
+        self.filas = {}         # producto_id -> fila en la tabla
+        self.por_codigo = {}    # Caché de productos ya escaneados
+        self.db.iniciar_conteo()
+
+        self.setWindowTitle("Conteo de inventario")
+        self.resize(800, 600)
+        layout = QVBoxLayout()
+
+        escaneo_layout = QHBoxLayout()
+        self.codigo_input = QLineEdit()
+        self.codigo_input.setPlaceholderText("Escanea el código, o escribe el PLU o el nombre")
+        self.codigo_input.setStyleSheet("font-size: 20px;")
+        self.codigo_input.returnPressed.connect(self.registrar_escaneo)
+        escaneo_layout.addWidget(self.codigo_input)
+        escaneo_layout.addWidget(QLabel("Cantidad:"))
+        self.cantidad = QDoubleSpinBox()
+        self.cantidad.setDecimals(3)
+        self.cantidad.setMinimum(0.001)
+        self.cantidad.setMaximum(100_000.0)
+        self.cantidad.setValue(1.0)
+        self.cantidad.setStyleSheet("font-size: 20px;")
+        escaneo_layout.addWidget(self.cantidad)
+        layout.addLayout(escaneo_layout)
+
+        self.estado = QLabel("")
+        self.estado.setStyleSheet("font-size: 16px; color: #c21807;")
+        layout.addWidget(self.estado)
+
+        self.tabla = QTableWidget(0, 3)
+        self.tabla.setHorizontalHeaderLabels(["Producto", "Código", "Contado"])
+        self.tabla.setStyleSheet("font-size: 17px;")
+        self.tabla.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabla.verticalHeader().setVisible(False)
+        self.tabla.setColumnWidth(0, 350)
+        self.tabla.setColumnWidth(1, 180)
+        layout.addWidget(self.tabla)
+
+        btns = QHBoxLayout()
+        btn_diferencias = QPushButton("Ver diferencias")
+        btn_diferencias.setStyleSheet("font-size: 18px; background-color: #1e88e5; color: white;")
+        btn_diferencias.clicked.connect(self.ver_diferencias)
+        btn_cerrar = QPushButton("Cerrar")
+        btn_cerrar.clicked.connect(self.reject)
+        btns.addWidget(btn_diferencias)
+        btns.addWidget(btn_cerrar)
+        layout.addLayout(btns)
+        self.setLayout(layout)
+
+    def registrar_escaneo(self):
+        codigo = self.codigo_input.text().strip()
+        self.codigo_input.clear()
+        if not codigo:
+            return
+        prod = self.por_codigo.get(codigo)
+        if prod is None:
+            prod = self.db.obtener_producto_por_codigo(codigo)
+            if prod:
+                self.por_codigo[codigo] = prod
+            else:
+                prod = self.buscar_sin_codigo(codigo)
+            if not prod:
+                return
+        self.estado.setText("")
+
+        prod_id = prod['id']
+        total = round(self.conteos.get(prod_id, 0) + self.cantidad.value(), 3)
+        self.conteos[prod_id] = total
+        self.pendientes[prod_id] = total
+        self.cantidad.setValue(1.0)
+
+        # Solo se toca la fila del producto escaneado
+        fila = self.filas.get(prod_id)
+        if fila is None:
+            fila = self.tabla.rowCount()
+            self.tabla.insertRow(fila)
+            self.tabla.setItem(fila, 0, QTableWidgetItem(prod['nombre']))
+            self.tabla.setItem(fila, 1, QTableWidgetItem(str(prod['codigo'] or "")))
+            self.filas[prod_id] = fila
+        self.tabla.setItem(fila, 2, QTableWidgetItem(f"{total:.3f}"))
+        self.tabla.scrollToItem(self.tabla.item(fila, 0))
+
+        if len(self.pendientes) >= self.GUARDAR_CADA:
+            self.guardar_pendientes()
+
+    def buscar_sin_codigo(self, texto):
+        # Productos sin código de barras: por PLU de balanza o por nombre
+        if texto.isdigit():
+            prod = self.db.obtener_producto_por_plu(normalizar_plu(texto))
+            if prod:
+                return prod
+        resultados = self.db.buscar_productos(texto, limite=2)
+        if not resultados:
+            self.estado.setText(f"No se encontró {texto!r} por código, PLU ni nombre.")
+            return None
+        if len(resultados) == 1:
+            return resultados[0]
+        dlg = SelectorProductoDialog(self.db, texto, self)
+        return dlg.producto if dlg.exec() else None
+
+    def guardar_pendientes(self):
+        if self.pendientes:
+            self.db.guardar_conteos(self.pendientes)
+            self.pendientes = {}
+
+    def ver_diferencias(self):
+        self.guardar_pendientes()
+        diferencias = self.db.obtener_diferencias_conteo()
+        if not diferencias:
+            QMessageBox.information(self, "Conteo", "No hay diferencias con el stock del sistema.")
+            return
+        dlg = DiferenciasConteoDialog(diferencias, parent=self)
+        if dlg.exec():
+            seleccionados = dlg.get_seleccionados()
+            if seleccionados:
+                self.db.aplicar_conteo(seleccionados)
+                QMessageBox.information(self, "Conteo", f"Stock ajustado en {len(seleccionados)} productos.")
+
+    def reject(self):
+        # Cerrar (botón, Esc o la ventana) descarta el conteo: se pide confirmación
+        if self.conteos:
+            respuesta = QMessageBox.question(
+                self, "Cerrar conteo",
+                f"Hay {len(self.conteos)} productos contados. Al cerrar se descarta el conteo.\n¿Cerrar de todos modos?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+            )
+            if respuesta != QMessageBox.Yes:
+                self.codigo_input.setFocus()
+                return
+        super().reject()
+
+    def done(self, result):
+        self.db.terminar_conteo()
+        super().done(result)
+
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key_Return, Qt.Key_Enter):
+            # El lector envía Enter; no debe cerrar el diálogo
+            event.ignore()
+        elif event.key() == Qt.Key_Escape:
+            # Un Esc suelto no debe perder el conteo sin preguntar
+            self.reject()
+        else:
+            super().keyPressEvent(event)
+
+
+class DiferenciasConteoDialog(QDialog):
+    def __init__(self, diferencias, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diferencias de conteo")
+        self.resize(850, 600)
+        self.diferencias = diferencias
+        layout = QVBoxLayout()
+
+        self.tabla = QTableWidget(len(diferencias), 5)
+        self.tabla.setHorizontalHeaderLabels(["Producto", "Código", "Sistema", "Contado", "Diferencia"])
+        self.tabla.setStyleSheet("font-size: 17px;")
+        self.tabla.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabla.verticalHeader().setVisible(False)
+        self.tabla.setColumnWidth(0, 300)
+        for i, dif in enumerate(diferencias):
+            item = QTableWidgetItem(dif['nombre'])
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            self.tabla.setItem(i, 0, item)
+            self.tabla.setItem(i, 1, QTableWidgetItem(str(dif['codigo'] or "")))
+            self.tabla.setItem(i, 2, QTableWidgetItem(f"{dif['cantidad_sistema']:.3f}"))
+            self.tabla.setItem(i, 3, QTableWidgetItem(f"{dif['contado']:.3f}"))
+            self.tabla.setItem(i, 4, QTableWidgetItem(f"{dif['diferencia']:+.3f}"))
+        layout.addWidget(self.tabla)
+
+        btns = QHBoxLayout()
+        btn_aplicar = QPushButton("Aplicar seleccionados")
+        btn_aplicar.setStyleSheet("font-size: 18px; background-color: #5fb85f; color: white;")
+        btn_aplicar.clicked.connect(self.accept)
+        btn_cancelar = QPushButton("Cancelar")
+        btn_cancelar.clicked.connect(self.reject)
+        btns.addWidget(btn_aplicar)
+        btns.addWidget(btn_cancelar)
+        layout.addLayout(btns)
+        self.setLayout(layout)
+
+    def get_seleccionados(self):
+        return [
+            dif['producto_id'] for i, dif in enumerate(self.diferencias)
+            if self.tabla.item(i, 0).checkState() == Qt.Checked
+        ]
+
+
+class HistorialProductoDialog(QDialog):
+    """Ventas de un producto: totales por periodo y tickets paginados del más reciente al más antiguo."""
+
+    POR_PAGINA = 50
+
+    def __init__(self, db: Database, producto, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.producto = producto
+        self.cursor = None     # (venta_id, detalle_id) de la última fila cargada
+        self.setWindowTitle(f"Historial — {producto['nombre']}")
+        self.resize(900, 700)
+        layout = QVBoxLayout()
+
+        periodo_layout = QHBoxLayout()
+        periodo_layout.addWidget(QLabel("Agrupar por:"))
+        self.combo_periodo = QComboBox()
+        self.combo_periodo.addItems(["Día", "Mes", "Año"])
+        self.combo_periodo.setCurrentText("Mes")
+        self.combo_periodo.setStyleSheet("font-size: 18px;")
+        self.combo_periodo.currentTextChanged.connect(self.cargar_resumen)
+        periodo_layout.addWidget(self.combo_periodo)
+        periodo_layout.addStretch()
+        layout.addLayout(periodo_layout)
+
+        self.tabla_resumen = QTableWidget(0, 3)
+        self.tabla_resumen.setHorizontalHeaderLabels(["Periodo", "Unidades", "Monto"])
+        self.tabla_resumen.setStyleSheet("font-size: 17px;")
+        self.tabla_resumen.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabla_resumen.verticalHeader().setVisible(False)
+        layout.addWidget(self.tabla_resumen)
+
+        self.tabla = QTableWidget(0, 5)
+        self.tabla.setHorizontalHeaderLabels(["Venta N°", "Fecha", "Cantidad", "Precio", "Subtotal"])
+        self.tabla.setStyleSheet("font-size: 17px;")
+        self.tabla.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabla.verticalHeader().setVisible(False)
+        self.tabla.setColumnWidth(1, 200)
+        layout.addWidget(self.tabla)
+
+        btns = QHBoxLayout()
+        self.btn_mas = QPushButton("Cargar más")
+        self.btn_mas.clicked.connect(self.cargar_pagina)
+        btn_cerrar = QPushButton("Cerrar")
+        btn_cerrar.clicked.connect(self.accept)
+        btns.addWidget(self.btn_mas)
+        btns.addWidget(btn_cerrar)
+        layout.addLayout(btns)
+        self.setLayout(layout)
+
+        self.cargar_resumen()
+        self.cargar_pagina()
+
+    def cargar_resumen(self):
+        resumen = self.db.resumen_producto_por_periodo(self.producto['id'], self.combo_periodo.currentText())
+        self.tabla_resumen.setRowCount(len(resumen))
+        for i, fila in enumerate(resumen):
+            self.tabla_resumen.setItem(i, 0, QTableWidgetItem(fila['periodo']))
+            self.tabla_resumen.setItem(i, 1, QTableWidgetItem(f"{fila['unidades']:g}"))
+            self.tabla_resumen.setItem(i, 2, QTableWidgetItem(f"${fila['monto']:,}"))
+
+    def cargar_pagina(self):
+        filas = self.db.obtener_historial_producto(self.producto['id'], antes_de=self.cursor, limite=self.POR_PAGINA)
+        inicio = self.tabla.rowCount()
+        self.tabla.setRowCount(inicio + len(filas))
+        for i, fila in enumerate(filas, start=inicio):
+            self.tabla.setItem(i, 0, QTableWidgetItem(str(fila['venta_id'])))
+            self.tabla.setItem(i, 1, QTableWidgetItem(fila['fecha']))
+            self.tabla.setItem(i, 2, QTableWidgetItem(f"{fila['cantidad']:g}"))
+            self.tabla.setItem(i, 3, QTableWidgetItem(f"${fila['precio_unitario']:,}"))
+            self.tabla.setItem(i, 4, QTableWidgetItem(f"${fila['subtotal']:,}"))
+        if filas:
+            self.cursor = (filas[-1]['venta_id'], filas[-1]['detalle_id'])
+        self.btn_mas.setEnabled(len(filas) == self.POR_PAGINA)
+
+
+class ReposicionDialog(QDialog):
+    """Productos bajo su stock mínimo, con venta reciente y días de cobertura."""
+
+    def __init__(self, reporte, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Sugerencias de reposición")
+        self.resize(1000, 600)
+        layout = QVBoxLayout()
+
+        if not reporte:
+            layout.addWidget(QLabel("No hay productos bajo su stock mínimo."))
+
+        tabla = QTableWidget(len(reporte), 8)
+        tabla.setHorizontalHeaderLabels([
+            "Producto", "Stock", "Mínimo", "Vendido 7d", "Vendido 30d", "Vendido 90d", "Días cobertura", "Sugerido"
+        ])
+        tabla.setStyleSheet("font-size: 17px;")
+        tabla.setEditTriggers(QTableWidget.NoEditTriggers)
+        tabla.verticalHeader().setVisible(False)
+        tabla.setColumnWidth(0, 250)
+        for i, fila in enumerate(reporte):
+            cobertura = "—" if fila['dias_cobertura'] is None else f"{fila['dias_cobertura']:.1f}"
+            tabla.setItem(i, 0, QTableWidgetItem(fila['nombre']))
+            tabla.setItem(i, 1, QTableWidgetItem(f"{fila['cantidad']:g}"))
+            tabla.setItem(i, 2, QTableWidgetItem(f"{fila['stock_minimo']:g}"))
+            tabla.setItem(i, 3, QTableWidgetItem(f"{fila['unidades_7']:g}"))
+            tabla.setItem(i, 4, QTableWidgetItem(f"{fila['unidades_30']:g}"))
+            tabla.setItem(i, 5, QTableWidgetItem(f"{fila['unidades_90']:g}"))
+            tabla.setItem(i, 6, QTableWidgetItem(cobertura))
+            tabla.setItem(i, 7, QTableWidgetItem(f"{fila['sugerido']:g}"))
+        layout.addWidget(tabla)
+
+        btn_cerrar = QPushButton("Cerrar")
+        btn_cerrar.clicked.connect(self.accept)
+        layout.addWidget(btn_cerrar)
+        self.setLayout(layout)
+
 
 class CodigoLineEdit(QLineEdit):
     def keyPressEvent(self, event):
@@ -136,6 +580,9 @@ class ProductoDialog(QDialog):
         self.nombre.setStyleSheet("font-size: 18px;")
         self.codigo = QLineEdit(str(producto['codigo']) if producto and producto['codigo'] else "")
         self.codigo.setStyleSheet("font-size: 18px;")
+        self.plu = QLineEdit(str(producto['plu']) if producto and producto.get('plu') else "")
+        self.plu.setPlaceholderText("Solo productos con etiqueta de balanza")
+        self.plu.setStyleSheet("font-size: 18px;")
 
         self.precio_compra = QSpinBox()
         self.precio_compra.setMaximum(1_000_000)
@@ -161,13 +608,20 @@ class ProductoDialog(QDialog):
         self.cantidad.setButtonSymbols(QDoubleSpinBox.NoButtons)
         self.cantidad.setStyleSheet("font-size: 18px;")
 
-
+        self.stock_minimo = QDoubleSpinBox()
+        self.stock_minimo.setDecimals(3)
+        self.stock_minimo.setMaximum(100_000.0)
+        self.stock_minimo.setValue(float(producto.get('stock_minimo') or 0) if producto else 0.0)
+        self.stock_minimo.setButtonSymbols(QDoubleSpinBox.NoButtons)
+        self.stock_minimo.setStyleSheet("font-size: 18px;")
 
         layout.addRow("Nombre*", self.nombre)
         layout.addRow("Código", self.codigo)
+        layout.addRow("PLU balanza", self.plu)
         layout.addRow("Precio compra*", self.precio_compra)
         layout.addRow("Precio venta*", self.precio_venta)
         layout.addRow("Cantidad*", self.cantidad)
+        layout.addRow("Stock mínimo", self.stock_minimo)
 
         btns = QHBoxLayout()
         btn_aceptar = QPushButton("Aceptar")
@@ -190,7 +644,9 @@ class ProductoDialog(QDialog):
         return {
             "nombre": self.nombre.text().strip(),
             "codigo": self.codigo.text().strip() or None,
+            "plu": normalizar_plu(self.plu.text()) or None,
             "precio_compra": int(self.precio_compra.value()),
             "precio_venta": int(self.precio_venta.value()),
-            "cantidad": float(self.cantidad.value())
+            "cantidad": float(self.cantidad.value()),
+            "stock_minimo": float(self.stock_minimo.value())
         }
@@ -3,6 +3,7 @@ from PySide6.QtWidgets import QApplication, QWidget, QTabWidget, QVBoxLayout
 from ui_inventario import InventarioWidget
 from ui_vender import VenderWidget
 from ui_registros import RegistrosWidget
+from ui_mantenimiento import ProgramadorMantenimiento
 from database import Database
 
 class MainWindow(QWidget):
@@ -27,3 +28,6 @@ class MainWindow(QWidget):
 
         layout.addWidget(self.tabs)
         self.setLayout(layout)
+
+        # Mantenimiento de la base cuando no hay ventas hace 10 minutos
+        self.mantenimiento = ProgramadorMantenimiento(self.db, minutos_inactividad=10, parent=self)
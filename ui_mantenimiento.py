@@ -0,0 +1,76 @@
+# ui_mantenimiento.py
+import logging
+import time
+
+from PySide6.QtCore import QObject, QTimer, Signal
+from database import Database, CAMBIO_VENTAS
+from mantenimiento import Mantenimiento
+
+logger = logging.getLogger("barrilito.mantenimiento")
+
+
+class ProgramadorMantenimiento(QObject):
+    """Corre el mantenimiento de la base en pasos cortos cuando no hay ventas hace un rato.
+
+    La conversión a auto_vacuum incremental (un VACUUM completo) no se hace desde aquí; queda para
+    'python -m barrilito mantenimiento'.
+    """
+
+    terminado = Signal(dict)  # Informe de la última pasada completa
+
+    def __init__(self, db: Database, minutos_inactividad=10, horas_entre_pasadas=24,
+                 presupuesto_paso=0.2, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.inactividad = minutos_inactividad * 60
+        self.intervalo = horas_entre_pasadas * 3600
+        self.presupuesto_paso = presupuesto_paso
+        self.tareas = Mantenimiento(db, permitir_compactar=False)
+        self.ultima_actividad = time.monotonic()
+        self.ultima_pasada = None   # monotonic de la última pasada completa
+        self.ultimo_informe = None
+        self.en_curso = False       # Hay una cadena de pasos programada con singleShot
+
+        self.db.suscribir(self._on_cambio)
+        self.timer = QTimer(self)
+        self.timer.setInterval(30_000)
+        self.timer.timeout.connect(self.revisar)
+        self.timer.start()
+
+    def _on_cambio(self, tipo, ids):
+        if tipo == CAMBIO_VENTAS:
+            self.ultima_actividad = time.monotonic()
+
+    def _inactivo(self):
+        return time.monotonic() - self.ultima_actividad >= self.inactividad
+
+    def revisar(self):
+        # Una sola cadena de pasos a la vez: solo se reanuda una que se detuvo
+        if self.en_curso or not self._inactivo():
+            return
+        if self.tareas.terminado:
+            if self.ultima_pasada is not None and time.monotonic() - self.ultima_pasada < self.intervalo:
+                return
+            self.tareas.reiniciar()
+        self._paso()
+
+    def _paso(self):
+        # Si volvió a haber ventas se deja a medias; revisar() continúa en el próximo rato libre
+        self.en_curso = False
+        if not self._inactivo():
+            return
+        try:
+            terminado = self.tareas.paso(self.presupuesto_paso)
+        except Exception:
+            # Por ejemplo "database is locked": se registra y se reintenta en el próximo rato libre
+            logger.exception("Falló un paso de mantenimiento (pendientes: %s)", ", ".join(self.tareas.pendientes))
+            self.db.conn.rollback()
+            return
+        if terminado:
+            self.ultima_pasada = time.monotonic()
+            self.ultimo_informe = dict(self.tareas.informe)
+            self.terminado.emit(self.ultimo_informe)
+        else:
+            # Deja respirar al bucle de eventos entre pasos
+            self.en_curso = True
+            QTimer.singleShot(100, self._paso)
@@ -1,16 +1,17 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QDateEdit, QPushButton,
     QTableWidget, QTableWidgetItem, QMessageBox, QComboBox, QDialog,
-    QFormLayout, QSpinBox, QDoubleSpinBox
+    QFormLayout, QDoubleSpinBox
 )
 from PySide6.QtCore import Qt, QDate
-from database import Database
+from database import Database, CAMBIO_VENTAS
 from datetime import timedelta
 
 class RegistrosWidget(QWidget):
     def __init__(self, db: Database, parent=None):
         super().__init__(parent)
         self.db = db
+        self._cambios = set()  # ids de ventas modificadas aún no reflejadas en la tabla
         self.init_ui()
         # Cargar ventas con filtro por defecto: Día y fecha actual
         self.combo_filtro.setCurrentText("Día")
@@ -21,6 +22,7 @@ class RegistrosWidget(QWidget):
         self.date_edit.dateChanged.connect(self.cargar_ventas)
         
         self.cargar_ventas()
+        self.db.suscribir(self._on_cambio)
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -61,6 +63,9 @@ class RegistrosWidget(QWidget):
         self.tabla.setStyleSheet("font-size: 17px;")
         self.tabla.setEditTriggers(QTableWidget.NoEditTriggers)
         self.tabla.verticalHeader().setVisible(False)
+        # Selección de varias filas (Shift/Ctrl) para anular ventas en bloque
+        self.tabla.setSelectionBehavior(QTableWidget.SelectRows)
+        self.tabla.setSelectionMode(QTableWidget.ExtendedSelection)
         layout.addWidget(self.tabla)
 
         # Total vendido
@@ -69,6 +74,11 @@ class RegistrosWidget(QWidget):
         self.total_label.setStyleSheet("font-size: 26px; font-weight: bold; color: #185fbc;")
         total_layout.addWidget(self.total_label)
         total_layout.addStretch()
+
+        btn_eliminar_sel = QPushButton("Eliminar seleccionadas")
+        btn_eliminar_sel.setStyleSheet("font-size: 18px; background-color: #c21807; color: white;")
+        btn_eliminar_sel.clicked.connect(self.eliminar_seleccionadas)
+        total_layout.addWidget(btn_eliminar_sel)
         layout.addLayout(total_layout)
 
         self.setLayout(layout)
@@ -104,38 +114,45 @@ class RegistrosWidget(QWidget):
         fecha = datetime.combine(fecha_qdate.toPython(), datetime.min.time())
 
         fecha_desde, fecha_hasta = self.calcular_rango_fechas(filtro, fecha)
-
-        ventas = self.db.obtener_ventas_filtradas(fecha_desde, fecha_hasta)
-        self.tabla.setRowCount(len(ventas))
-
-        total_vendido = 0
-        for i, venta in enumerate(ventas):
-            self.tabla.setItem(i, 0, QTableWidgetItem(venta['fecha']))
-            self.tabla.setItem(i, 1, QTableWidgetItem(f"${venta['total']:,}"))
-            self.tabla.setRowHeight(i, 80)
-
-            btn_layout = QHBoxLayout()
-            btn_detalle = QPushButton("Ver detalle")
-            btn_detalle.setStyleSheet("background-color: green; color: black; font-size: 14px;")
-            btn_detalle.clicked.connect(lambda checked, venta_id=venta['id']: self.ver_detalle_venta(venta_id))
-
-            btn_editar = QPushButton("Editar")
-            btn_editar.setStyleSheet("background-color: orange; color: black; font-size: 14px;")
-            btn_editar.clicked.connect(lambda checked, venta_id=venta['id']: self.editar_venta(venta_id))
-
-            btn_eliminar = QPushButton("Eliminar")
-            btn_eliminar.setStyleSheet("background-color: red; color: black; font-size: 14px;")
-            btn_eliminar.clicked.connect(lambda checked, venta_id=venta['id']: self.eliminar_venta(venta_id))
-
-            btn_layout.addWidget(btn_detalle)
-            btn_layout.addWidget(btn_editar)
-            btn_layout.addWidget(btn_eliminar)
-
-            contenedor = QWidget()
-            contenedor.setLayout(btn_layout)
-            self.tabla.setCellWidget(i, 2, contenedor)
-
-            total_vendido += venta['total']
+        self._rango = (fecha_desde.strftime("%Y-%m-%d %H:%M:%S"), fecha_hasta.strftime("%Y-%m-%d %H:%M:%S"))
+
+        self._ventas = self.db.obtener_ventas_filtradas(fecha_desde, fecha_hasta)
+        self._cambios = set()
+        self._version = self.db.version_datos()
+        self.tabla.setRowCount(len(self._ventas))
+        for i, venta in enumerate(self._ventas):
+            self._pintar_fila(i, venta)
+        self.actualizar_total()
+
+    def _pintar_fila(self, i, venta):
+        self.tabla.setItem(i, 0, QTableWidgetItem(venta['fecha']))
+        self.tabla.setItem(i, 1, QTableWidgetItem(f"${venta['total']:,}"))
+        self.tabla.setRowHeight(i, 80)
+
+        btn_layout = QHBoxLayout()
+        btn_detalle = QPushButton("Ver detalle")
+        btn_detalle.setStyleSheet("background-color: green; color: black; font-size: 14px;")
+        btn_detalle.clicked.connect(lambda checked, venta_id=venta['id']: self.ver_detalle_venta(venta_id))
+
+        btn_editar = QPushButton("Editar")
+        btn_editar.setStyleSheet("background-color: orange; color: black; font-size: 14px;")
+        btn_editar.clicked.connect(lambda checked, venta_id=venta['id']: self.editar_venta(venta_id))
+
+        btn_eliminar = QPushButton("Eliminar")
+        btn_eliminar.setStyleSheet("background-color: red; color: black; font-size: 14px;")
+        btn_eliminar.clicked.connect(lambda checked, venta_id=venta['id']: self.eliminar_venta(venta_id))
+
+        btn_layout.addWidget(btn_detalle)
+        btn_layout.addWidget(btn_editar)
+        btn_layout.addWidget(btn_eliminar)
+
+        contenedor = QWidget()
+        contenedor.setLayout(btn_layout)
+        self.tabla.setCellWidget(i, 2, contenedor)
+
+    def actualizar_total(self):
+        filtro = self.combo_filtro.currentText()
+        total_vendido = sum(venta['total'] for venta in self._ventas)
 
         # Cambiar texto de total vendido según filtro
         texto_total = f"Total vendido"
@@ -150,6 +167,48 @@ class RegistrosWidget(QWidget):
 
         self.total_label.setText(f"{texto_total}: ${total_vendido:,}")
 
+    def _on_cambio(self, tipo, ids):
+        if tipo != CAMBIO_VENTAS:
+            return
+        if ids is None:
+            self._version = None  # Fuerza recarga completa
+        else:
+            self._cambios.update(ids)
+        if self.isVisible():
+            self.aplicar_cambios()
+
+    def aplicar_cambios(self):
+        # Cambios hechos por otro proceso: no sabemos qué ventas, se recarga todo
+        if self.db.version_datos() != self._version:
+            self.cargar_ventas()
+            return
+        if not self._cambios:
+            return
+        cambios, self._cambios = self._cambios, set()
+        for venta_id in cambios:
+            self.actualizar_fila_venta(venta_id)
+        self.actualizar_total()
+
+    def actualizar_fila_venta(self, venta_id):
+        """Refleja en la tabla el estado actual de una venta (nueva, editada o eliminada)."""
+        fila = next((i for i, v in enumerate(self._ventas) if v['id'] == venta_id), None)
+        venta = self.db.obtener_venta(venta_id)
+        en_rango = venta is not None and self._rango[0] <= venta['fecha'] <= self._rango[1]
+
+        if fila is not None:
+            if en_rango:
+                self._ventas[fila] = venta
+                self._pintar_fila(fila, venta)
+                return
+            self.tabla.removeRow(fila)
+            del self._ventas[fila]
+        elif en_rango:
+            # Mismo orden que obtener_ventas_filtradas (por id)
+            fila = next((i for i, v in enumerate(self._ventas) if v['id'] > venta_id), len(self._ventas))
+            self.tabla.insertRow(fila)
+            self._ventas.insert(fila, venta)
+            self._pintar_fila(fila, venta)
+
     def ver_detalle_venta(self, venta_id):
         detalle = self.db.obtener_detalle_venta(venta_id)
         if not detalle:
@@ -166,7 +225,21 @@ class RegistrosWidget(QWidget):
         if res == QMessageBox.Yes:
             self.db.eliminar_venta(venta_id)
             QMessageBox.information(self, "Eliminada", "Venta eliminada y stock actualizado.")
-            self.cargar_ventas()
+
+    def eliminar_seleccionadas(self):
+        filas = sorted({index.row() for index in self.tabla.selectionModel().selectedRows()})
+        if not filas:
+            QMessageBox.information(self, "Eliminar ventas", "Selecciona una o más ventas en la tabla.")
+            return
+        ventas = [self._ventas[fila] for fila in filas]
+        total = sum(venta['total'] for venta in ventas)
+        res = QMessageBox.question(
+            self, "Eliminar ventas",
+            f"¿Seguro que deseas eliminar {len(ventas)} ventas por ${total:,}? Esto devolverá el stock.",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if res == QMessageBox.Yes:
+            eliminadas = self.db.eliminar_ventas([venta['id'] for venta in ventas])
+            QMessageBox.information(self, "Eliminadas", f"{eliminadas} ventas eliminadas y stock actualizado.")
 
     def editar_venta(self, venta_id):
         detalle = self.db.obtener_detalle_venta(venta_id)
@@ -178,11 +251,10 @@ class RegistrosWidget(QWidget):
             items_actualizados = dlg.get_data()
             self.db.actualizar_venta(venta_id, items_actualizados)
             QMessageBox.information(self, "Editada", "Venta actualizada correctamente.")
-            self.cargar_ventas()
 
     def showEvent(self, event):
         super().showEvent(event)
-        self.cargar_ventas()
+        self.aplicar_cambios()
 
 
 class EditarVentaDialog(QDialog):
@@ -194,7 +266,14 @@ class EditarVentaDialog(QDialog):
         self.inputs = []
 
         for item in detalle:
-            cantidad_input = QSpinBox()
+            if item['precio_fijo']:
+                # Etiqueta de balanza con precio: se cobra lo impreso, no se edita
+                layout.addRow(f"{item['nombre_producto']}:",
+                              QLabel(f"Etiqueta de ${item['subtotal']:,} ({item['cantidad']:.3f} estimado)"))
+                self.inputs.append((item, None, None))
+                continue
+            cantidad_input = QDoubleSpinBox()
+            cantidad_input.setDecimals(3)
             cantidad_input.setMaximum(10000)
             cantidad_input.setValue(item['cantidad'])
 
@@ -205,7 +284,7 @@ class EditarVentaDialog(QDialog):
             layout.addRow(f"{item['nombre_producto']} - Cantidad:", cantidad_input)
             layout.addRow(f"{item['nombre_producto']} - Precio unitario:", precio_input)
 
-            self.inputs.append((item['producto_id'], cantidad_input, precio_input))
+            self.inputs.append((item, cantidad_input, precio_input))
 
         btns = QHBoxLayout()
         btn_aceptar = QPushButton("Aceptar")
@@ -220,9 +299,12 @@ class EditarVentaDialog(QDialog):
 
     def get_data(self):
         items = []
-        for producto_id, cantidad_input, precio_input in self.inputs:
+        for item, cantidad_input, precio_input in self.inputs:
+            if cantidad_input is None:
+                items.append(dict(item))
+                continue
             items.append({
-                'producto_id': producto_id,
+                'producto_id': item['producto_id'],
                 'cantidad': cantidad_input.value(),
                 'precio_unitario': precio_input.value()
             })
@@ -3,20 +3,30 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
     QTableWidget, QTableWidgetItem, QDialog, QSpinBox, QMessageBox
 )
-from PySide6.QtCore import Qt
-from database import Database
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+from database import Database, CAMBIO_VENTAS
+from balanza import cargar_formatos, decodificar_etiqueta
 from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QMessageBox
 from PySide6.QtWidgets import QDoubleSpinBox
+from PySide6.QtWidgets import QInputDialog, QListWidget, QListWidgetItem, QGridLayout, QMenu
+from PySide6.QtWidgets import QApplication, QListView
 class VenderWidget(QWidget):
-    
+    TECLAS_RAPIDAS = 12
+
 
     def __init__(self, db: Database, parent=None):
         super().__init__(parent)
         self.db = db
         self.items_venta = []  # Lista de dicts con producto, cantidad, precio_unitario, subtotal
+        # Carros aparcados: id -> {'id', 'fecha', 'etiqueta', 'items'}; también guardados en la base
+        self.aparcados = {t['id']: t for t in self.db.obtener_tickets_aparcados()}
+        self.formatos_balanza = cargar_formatos()
+        self.teclas = []  # Productos de las teclas rápidas (caché; tocar una tecla no consulta la base)
 
         self.init_ui()
+        self.cargar_teclas()
+        self.db.suscribir(self._on_cambio)
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -35,6 +45,37 @@ class VenderWidget(QWidget):
         buscador_layout.addWidget(buscar_btn)
         layout.addLayout(buscador_layout)
 
+        # Teclas rápidas: productos sin código de barras más vendidos o fijados
+        self.teclas_layout = QGridLayout()
+        self.botones_teclas = []
+        for i in range(self.TECLAS_RAPIDAS):
+            btn = QPushButton()
+            btn.setFixedHeight(50)
+            btn.setStyleSheet("font-size: 16px; padding: 4px;")
+            btn.setContextMenuPolicy(Qt.CustomContextMenu)
+            btn.clicked.connect(lambda checked, i=i: self.usar_tecla(i))
+            btn.customContextMenuRequested.connect(lambda pos, i=i: self.menu_tecla(i))
+            self.teclas_layout.addWidget(btn, i // 6, i % 6)
+            self.botones_teclas.append(btn)
+        layout.addLayout(self.teclas_layout)
+
+        # Editar teclas sin clic derecho (pantalla táctil): en este modo tocar una tecla la fija o la suelta
+        editar_teclas_layout = QHBoxLayout()
+        self.btn_editar_teclas = QPushButton("📌 Fijar / soltar teclas")
+        self.btn_editar_teclas.setCheckable(True)
+        self.btn_editar_teclas.setFixedHeight(40)
+        self.btn_editar_teclas.setStyleSheet("font-size: 16px;")
+        self.btn_editar_teclas.toggled.connect(self.modo_editar_teclas)
+        self.btn_fijar_otro = QPushButton("Fijar otro producto…")
+        self.btn_fijar_otro.setFixedHeight(40)
+        self.btn_fijar_otro.setStyleSheet("font-size: 16px;")
+        self.btn_fijar_otro.clicked.connect(self.fijar_otro_producto)
+        self.btn_fijar_otro.setVisible(False)
+        editar_teclas_layout.addWidget(self.btn_editar_teclas)
+        editar_teclas_layout.addWidget(self.btn_fijar_otro)
+        editar_teclas_layout.addStretch()
+        layout.addLayout(editar_teclas_layout)
+
         # Tabla de productos en la venta
         self.tabla = QTableWidget(0, 5)
         self.tabla.setHorizontalHeaderLabels([
@@ -51,6 +92,17 @@ class VenderWidget(QWidget):
         self.total_label.setStyleSheet("font-size: 32px; font-weight: bold; color: #155f03;")
         total_layout.addWidget(self.total_label)
         total_layout.addStretch()
+
+        btn_aparcar = QPushButton("Aparcar")
+        btn_aparcar.setStyleSheet("font-size: 20px; background-color: #f0a030; color: white;")
+        btn_aparcar.clicked.connect(self.aparcar_venta)
+        total_layout.addWidget(btn_aparcar)
+
+        self.btn_recuperar = QPushButton()
+        self.btn_recuperar.setStyleSheet("font-size: 20px; background-color: #1e88e5; color: white;")
+        self.btn_recuperar.clicked.connect(self.recuperar_venta)
+        total_layout.addWidget(self.btn_recuperar)
+        self.actualizar_boton_aparcados()
         layout.addLayout(total_layout)
 
         # Botón registrar venta
@@ -68,10 +120,10 @@ class VenderWidget(QWidget):
             QMessageBox.warning(self, "Venta vacía", "Agrega productos para registrar la venta.")
             return
 
-        # Validar stock
-        for item in self.items_venta:
-            prod = self.db.obtener_producto_por_id(item['producto_id'])
-            if round(item['cantidad'], 3) > round(prod['cantidad'], 3):
+        # Validar stock (un producto puede estar en varias líneas, p. ej. etiquetas de precio)
+        for producto_id in {item['producto_id'] for item in self.items_venta}:
+            prod = self.db.obtener_producto_por_id(producto_id)
+            if round(self._cantidad_en_venta(producto_id), 3) > round(prod['cantidad'], 3):
                 QMessageBox.warning(self, "Stock insuficiente", f"No hay suficiente stock para {prod['nombre']}.")
                 return
 
@@ -90,6 +142,122 @@ class VenderWidget(QWidget):
         QTimer.singleShot(1000, msg.accept)
 
 
+    def cargar_teclas(self):
+        self.teclas = self.db.obtener_teclas_rapidas(self.TECLAS_RAPIDAS)
+        for i, btn in enumerate(self.botones_teclas):
+            if i < len(self.teclas):
+                prod = self.teclas[i]
+                fijo = "📌 " if prod['fijo'] is not None else ""
+                btn.setText(f"{fijo}{prod['nombre']}")
+                btn.setVisible(True)
+            else:
+                btn.setVisible(False)
+
+    def _on_cambio(self, tipo, ids):
+        # Cada venta puede cambiar el ranking; cambios de productos solo importan si están en las teclas
+        if tipo == CAMBIO_VENTAS or ids is None or ids & {prod['id'] for prod in self.teclas}:
+            self.cargar_teclas()
+
+    def usar_tecla(self, i):
+        if i >= len(self.teclas):
+            return
+        if self.btn_editar_teclas.isChecked():
+            self.alternar_fijo(self.teclas[i])
+        else:
+            self.popup_cantidad(self.teclas[i])
+
+    def alternar_fijo(self, prod):
+        self.db.fijar_tecla_rapida(prod['id'], prod['fijo'] is None)
+        self.cargar_teclas()
+
+    def modo_editar_teclas(self, activo):
+        self.btn_fijar_otro.setVisible(activo)
+        self.btn_editar_teclas.setText("Listo" if activo else "📌 Fijar / soltar teclas")
+
+    def fijar_otro_producto(self):
+        if sum(prod['fijo'] is not None for prod in self.teclas) >= self.TECLAS_RAPIDAS:
+            QMessageBox.information(self, "Teclas rápidas", "Todas las teclas están fijadas; suelta una primero.")
+            return
+        dlg = SelectorProductoDialog(self.db, parent=self)
+        if dlg.exec() and dlg.producto:
+            self.db.fijar_tecla_rapida(dlg.producto['id'])
+            self.cargar_teclas()
+
+    def menu_tecla(self, i):
+        if i >= len(self.teclas):
+            return
+        prod = self.teclas[i]
+        menu = QMenu(self)
+        if prod['fijo'] is None:
+            accion = menu.addAction("Fijar en teclas rápidas")
+        else:
+            accion = menu.addAction("Soltar de teclas rápidas")
+        if menu.exec(self.botones_teclas[i].mapToGlobal(self.botones_teclas[i].rect().bottomLeft())) == accion:
+            self.alternar_fijo(prod)
+
+    def actualizar_boton_aparcados(self):
+        self.btn_recuperar.setText(f"Aparcados ({len(self.aparcados)})")
+        self.btn_recuperar.setEnabled(bool(self.aparcados))
+
+    def aparcar_venta(self, etiqueta=None):
+        """Guarda el carro actual para retomarlo después y deja la caja libre."""
+        if not self.items_venta:
+            QMessageBox.information(self, "Aparcar", "No hay productos en la venta.")
+            return
+        if not etiqueta:
+            sugerida = f"Ticket {max(self.aparcados, default=0) + 1}"
+            etiqueta, ok = QInputDialog.getText(self, "Aparcar venta", "Nombre del ticket:", text=sugerida)
+            if not ok:
+                return
+            etiqueta = etiqueta.strip() or sugerida
+        ticket = self.db.aparcar_ticket(self.items_venta, etiqueta)
+        self.aparcados[ticket['id']] = ticket
+        self.items_venta = []
+        self.actualizar_tabla()
+        self.actualizar_boton_aparcados()
+        self.busqueda_input.setFocus()
+
+    def recuperar_venta(self):
+        dlg = QDialog(self)
+        dlg.setWindowTitle("Ventas aparcadas")
+        layout = QVBoxLayout()
+        lista = QListWidget()
+        lista.setStyleSheet("font-size: 20px;")
+        for ticket in self.aparcados.values():
+            total = sum(item['subtotal'] for item in ticket['items'])
+            item = QListWidgetItem(
+                f"{ticket['etiqueta']} — {len(ticket['items'])} productos — ${total:,} ({ticket['fecha'][11:16]})"
+            )
+            item.setData(Qt.UserRole, ticket['id'])
+            lista.addItem(item)
+        lista.setCurrentRow(0)
+        lista.itemActivated.connect(dlg.accept)
+        layout.addWidget(lista)
+        btn_layout = QHBoxLayout()
+        btn_ok = QPushButton("Retomar")
+        btn_ok.setStyleSheet("font-size: 20px; background: #38ad18; color: white;")
+        btn_ok.clicked.connect(dlg.accept)
+        btn_cancel = QPushButton("Cancelar")
+        btn_cancel.clicked.connect(dlg.reject)
+        btn_layout.addWidget(btn_ok)
+        btn_layout.addWidget(btn_cancel)
+        layout.addLayout(btn_layout)
+        dlg.setLayout(layout)
+        if not dlg.exec() or lista.currentItem() is None:
+            return
+        self.retomar_venta(lista.currentItem().data(Qt.UserRole))
+
+    def retomar_venta(self, ticket_id):
+        ticket = self.aparcados.pop(ticket_id)
+        # Si había un carro en curso, se aparca en su lugar para no perderlo
+        if self.items_venta:
+            self.aparcar_venta(etiqueta=f"Ticket {max(self.aparcados, default=0) + 1}")
+        self.db.eliminar_ticket_aparcado(ticket_id)
+        self.items_venta = ticket['items']
+        self.actualizar_tabla()
+        self.actualizar_boton_aparcados()
+        self.busqueda_input.setFocus()
+
     def buscar_producto(self):
         texto = self.busqueda_input.text().strip()
         if not texto:
@@ -100,15 +268,35 @@ class VenderWidget(QWidget):
         if prod:
             self.popup_cantidad(prod)
             return
-        # Si no es código, busca por nombre similar
-        resultados = self.db.obtener_productos(filtro=texto)
+        # Etiqueta de balanza: el código trae el PLU y el peso o el precio
+        etiqueta = decodificar_etiqueta(texto, self.formatos_balanza)
+        if etiqueta:
+            self.agregar_etiqueta_balanza(etiqueta)
+            return
+        # Si no es código, busca por nombre similar (con 2 filas alcanza para saber si hay que elegir)
+        resultados = self.db.buscar_productos(texto, limite=2)
         if not resultados:
             QMessageBox.warning(self, "No encontrado", "No se encontró ningún producto.")
         elif len(resultados) == 1:
             self.popup_cantidad(resultados[0])
         else:
-            # Si hay varios resultados, muestra lista para elegir
-            self.popup_elegir_producto(resultados)
+            # Si hay varios resultados, muestra el selector para elegir
+            self.popup_elegir_producto(texto)
+
+    def agregar_etiqueta_balanza(self, etiqueta):
+        prod = self.db.obtener_producto_por_plu(etiqueta['plu'])
+        if not prod:
+            QMessageBox.warning(self, "No encontrado", f"No hay producto con PLU {etiqueta['plu']}.")
+            return
+        if etiqueta['tipo'] == "peso":
+            self.agregar_a_venta(prod, etiqueta['valor'])
+            return
+        if not prod['precio_venta']:
+            QMessageBox.warning(self, "Precio", f"{prod['nombre']} no tiene precio de venta.")
+            return
+        # Se cobra lo impreso en la etiqueta; la cantidad solo estima cuánto stock descontar
+        cantidad = round(etiqueta['valor'] / prod['precio_venta'], 3)
+        self.agregar_a_venta(prod, cantidad, subtotal=round(etiqueta['valor']))
 
     def popup_cantidad(self, prod):
         from PySide6.QtWidgets import QDoubleSpinBox  
@@ -140,43 +328,49 @@ class VenderWidget(QWidget):
         dlg.setLayout(layout)
         dlg.exec()
 
-    def popup_elegir_producto(self, resultados):
-        dlg = QDialog(self)
-        dlg.setWindowTitle("Elige un producto")
-        layout = QVBoxLayout()
-        for prod in resultados:
-            btn = QPushButton(f"{prod['nombre']} (Cod: {prod['codigo']}) — Stock: {prod['cantidad']}")
-            btn.setStyleSheet("font-size: 18px;")
-            btn.clicked.connect(lambda _, p=prod: [dlg.accept(), self.popup_cantidad(p)])
-            layout.addWidget(btn)
-        dlg.setLayout(layout)
-        dlg.exec()
+    def popup_elegir_producto(self, texto):
+        dlg = SelectorProductoDialog(self.db, texto, self)
+        if dlg.exec() and dlg.producto:
+            self.popup_cantidad(dlg.producto)
 
-    def agregar_a_venta(self, prod, cantidad, dlg):
+    def _cantidad_en_venta(self, producto_id):
+        return sum(item['cantidad'] for item in self.items_venta if item['producto_id'] == producto_id)
+
+    def agregar_a_venta(self, prod, cantidad, dlg=None, subtotal=None):
+        """subtotal fijo (etiqueta con precio): va en su propia línea y nunca se recalcula ni se suma a otra."""
         # Si ya está en la lista, suma cantidad
         for item in self.items_venta:
-            if item['producto_id'] == prod['id']:
-                if item['cantidad'] + cantidad > prod['cantidad']:
+            if subtotal is None and item['producto_id'] == prod['id'] and not item.get('precio_fijo'):
+                if self._cantidad_en_venta(prod['id']) + cantidad > prod['cantidad']:
                     QMessageBox.warning(self, "Stock insuficiente", "No hay suficiente stock.")
                     return
                 item['cantidad'] += cantidad
                 item['subtotal'] = item['cantidad'] * item['precio_unitario']
                 self.actualizar_tabla()
                 self.busqueda_input.clear()  # <--- limpia el input aquí
-                dlg.accept()
+                if dlg:
+                    dlg.accept()
                 return
+        if self._cantidad_en_venta(prod['id']) + cantidad > prod['cantidad']:
+            QMessageBox.warning(self, "Stock insuficiente", "No hay suficiente stock.")
+            return
         # Si es nuevo producto en la venta
-        self.items_venta.append({
+        item = {
             'producto_id': prod['id'],
             'nombre': prod['nombre'],
             'codigo': prod['codigo'],
             'precio_unitario': prod['precio_venta'],
             'cantidad': cantidad,
             'subtotal': cantidad * prod['precio_venta']
-        })
+        }
+        if subtotal is not None:
+            item['subtotal'] = subtotal
+            item['precio_fijo'] = True
+        self.items_venta.append(item)
         self.actualizar_tabla()
         self.busqueda_input.clear()  # <--- limpia el input aquí también
-        dlg.accept()
+        if dlg:
+            dlg.accept()
 
 
     def actualizar_tabla(self):
@@ -204,6 +398,10 @@ class VenderWidget(QWidget):
         spin.setMinimum(0.001)
         spin.setMaximum(99999)
         spin.setValue(float(item['cantidad']))
+        if item.get('precio_fijo'):
+            # Línea de etiqueta con precio: se cobra lo impreso, solo se puede eliminar
+            spin.setEnabled(False)
+            lbl.setText(f"{lbl.text()}\nPrecio de etiqueta: ${item['subtotal']}")
 
         spin.setStyleSheet("font-size: 24px;")
         layout.addWidget(spin)
@@ -215,6 +413,7 @@ class VenderWidget(QWidget):
         btn_del.setStyleSheet("font-size: 20px; background: #c21807; color: white;")
         btn_cancel.setStyleSheet("font-size: 20px;")
         btn_ok.clicked.connect(lambda: self.actualizar_cantidad(row, spin.value(), dlg))
+        btn_ok.setVisible(not item.get('precio_fijo'))
         btn_del.clicked.connect(lambda: self.eliminar_item(row, dlg))
         btn_cancel.clicked.connect(dlg.reject)
         btn_layout.addWidget(btn_ok)
@@ -236,4 +435,110 @@ class VenderWidget(QWidget):
         self.actualizar_tabla()
         dlg.accept()
 
-    
\ No newline at end of file
+    
+class ResultadosProductoModel(QAbstractListModel):
+    """Resultados de buscar_productos; carga de a una página cuando la lista llega al final."""
+
+    POR_PAGINA = 50
+
+    def __init__(self, db: Database, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.texto = ""
+        self.filas = []
+        self.hay_mas = False
+
+    def buscar(self, texto):
+        self.beginResetModel()
+        self.texto = texto
+        self.filas = self.db.buscar_productos(texto, self.POR_PAGINA) if texto else []
+        self.hay_mas = len(self.filas) == self.POR_PAGINA
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.filas)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            prod = self.filas[index.row()]
+            return f"{prod['nombre']} (Cod: {prod['codigo']}) — Stock: {prod['cantidad']}"
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.hay_mas
+
+    def fetchMore(self, parent=QModelIndex()):
+        nuevas = self.db.buscar_productos(self.texto, self.POR_PAGINA, despues_de=self.filas[-1])
+        self.hay_mas = len(nuevas) == self.POR_PAGINA
+        if nuevas:
+            self.beginInsertRows(QModelIndex(), len(self.filas), len(self.filas) + len(nuevas) - 1)
+            self.filas.extend(nuevas)
+            self.endInsertRows()
+
+
+class BusquedaLineEdit(QLineEdit):
+    def __init__(self, lista, parent=None):
+        super().__init__(parent)
+        self.lista = lista
+
+    def keyPressEvent(self, event):
+        # Las flechas mueven la selección de la lista sin sacar el foco del texto
+        if event.key() in (Qt.Key_Up, Qt.Key_Down, Qt.Key_PageUp, Qt.Key_PageDown):
+            QApplication.sendEvent(self.lista, event)
+        else:
+            super().keyPressEvent(event)
+
+
+class SelectorProductoDialog(QDialog):
+    """Buscar mientras se escribe: cada pulsación (con una pausa corta) consulta solo una página."""
+
+    ESPERA_MS = 150
+
+    def __init__(self, db: Database, texto="", parent=None):
+        super().__init__(parent)
+        self.producto = None
+        self.setWindowTitle("Elige un producto")
+        self.resize(700, 600)
+        layout = QVBoxLayout()
+
+        self.lista = QListView()
+        self.lista.setStyleSheet("font-size: 18px;")
+        self.lista.setUniformItemSizes(True)
+        self.modelo = ResultadosProductoModel(db, self)
+        self.lista.setModel(self.modelo)
+        self.lista.activated.connect(self.elegir)
+
+        self.busqueda = BusquedaLineEdit(self.lista)
+        self.busqueda.setPlaceholderText("Nombre o código…")
+        self.busqueda.setFixedHeight(40)
+        self.busqueda.setStyleSheet("font-size: 20px;")
+        self.busqueda.setText(texto)
+        self.busqueda.returnPressed.connect(self.elegir)
+        layout.addWidget(self.busqueda)
+        layout.addWidget(self.lista)
+        self.setLayout(layout)
+
+        self.espera = QTimer(self)
+        self.espera.setSingleShot(True)
+        self.espera.setInterval(self.ESPERA_MS)
+        self.espera.timeout.connect(self.buscar)
+        self.busqueda.textChanged.connect(self.espera.start)
+
+        self.buscar()
+        self.busqueda.setFocus()
+
+    def buscar(self):
+        self.espera.stop()
+        self.modelo.buscar(self.busqueda.text().strip())
+        if self.modelo.rowCount():
+            self.lista.setCurrentIndex(self.modelo.index(0))
+
+    def elegir(self, index=None):
+        if self.espera.isActive():
+            # Enter antes de que venza la pausa: busca con el texto actual
+            self.buscar()
+        if index is None:
+            index = self.lista.currentIndex()
+        if index.isValid():
+            self.producto = self.modelo.filas[index.row()]
+            self.accept()
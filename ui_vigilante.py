@@ -0,0 +1,82 @@
+# ui_vigilante.py
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from logging.handlers import RotatingFileHandler
+
+from PySide6.QtCore import QObject, QTimer
+
+logger = logging.getLogger("barrilito.vigilante")
+
+
+class VigilanteBucle(QObject):
+    """Detecta cuando el bucle de eventos de Qt deja de atender y registra qué estaba haciendo.
+
+    Un QTimer en el hilo principal marca un latido; un hilo aparte revisa que el latido avance.
+    Si pasa más de `umbral` segundos sin latir, guarda la pila del hilo principal y el método de
+    Database en curso (si lo hay) en un log rotativo, y luego cuánto duró el bloqueo en total.
+    """
+
+    def __init__(self, ruta_log, umbral=1.0, intervalo_latido=0.1, parent=None):
+        super().__init__(parent)
+        self.umbral = umbral
+        self._hilo_principal = threading.get_ident()
+        self._latido = time.monotonic()
+        self._bloqueo = None   # Valor del latido en el que se detectó el bloqueo actual
+        self._detener = threading.Event()
+
+        handler = RotatingFileHandler(ruta_log, maxBytes=1_000_000, backupCount=5, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(intervalo_latido * 1000))
+        self.timer.timeout.connect(self._latir)
+        self.timer.start()
+
+        self._hilo = threading.Thread(target=self._vigilar, name="vigilante", daemon=True)
+        self._hilo.start()
+
+    def _latir(self):
+        self._latido = time.monotonic()
+
+    def detener(self):
+        self._detener.set()
+        self.timer.stop()
+
+    def _vigilar(self):
+        while not self._detener.wait(self.umbral / 4):
+            latido = self._latido
+            if self._bloqueo is not None and latido != self._bloqueo:
+                logger.warning("Bucle de eventos recuperado tras %.2f s", latido - self._bloqueo)
+                self._bloqueo = None
+            demora = time.monotonic() - latido
+            if demora >= self.umbral and self._bloqueo is None:
+                self._bloqueo = latido
+                self._registrar_bloqueo(demora)
+
+    def _registrar_bloqueo(self, demora):
+        frame = sys._current_frames().get(self._hilo_principal)
+        if frame is None:
+            return
+        pila = "".join(traceback.format_stack(frame))
+        logger.warning(
+            "Bucle de eventos sin responder hace %.2f s; método de Database en curso: %s\n%s",
+            demora, metodo_database(frame) or "ninguno", pila
+        )
+
+
+def metodo_database(frame):
+    """Primer método de database.py en la pila (el llamado desde la interfaz), o None."""
+    encontrado = None
+    while frame is not None:
+        codigo = frame.f_code
+        if os.path.basename(codigo.co_filename) == "database.py":
+            encontrado = getattr(codigo, "co_qualname", codigo.co_name)
+        frame = frame.f_back
+    return encontrado